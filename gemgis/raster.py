@@ -19,15 +19,28 @@ GNU General Public License (LICENSE.md) for more details.
 
 """
 
+import os
+import tempfile
+import types
+import weakref
 import numpy as np
 import rasterio
+import rasterio.shutil
 import pandas as pd
 import geopandas as gpd
 from typing import Union, List
-from skimage.transform import resize
-from gemgis.utils import set_extent, create_bbox, getFeatures
+from gemgis.utils import set_extent, create_bbox, getFeatures, get_transformer
 from rasterio.mask import mask
+from rasterio.features import geometry_mask
+from rasterio.windows import Window
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import transform_bounds
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
 from shapely.geometry import box
+from scipy.ndimage import uniform_filter
+from scipy import sparse
 import shapely
 
 
@@ -100,6 +113,266 @@ def sample(array: np.ndarray, extent: list, point: list) -> float:
     return samp
 
 
+# Function tested
+def sample_points(array: Union[np.ndarray, rasterio.io.DatasetReader],
+                  extent: List[Union[int, float]],
+                  points: Union[np.ndarray, List[List[Union[int, float]]]],
+                  interpolation: str = 'nearest') -> np.ndarray:
+    """Sampling the raster values of a raster at multiple points at once given its true extent
+    Args:
+        array - np.ndarray or rasterio object containing the raster values
+        extent - list containing the values for the extent of the array (minx,maxx,miny,maxy)
+        points - np.ndarray of shape (N,2) or list containing the x and y coordinates of the points
+        interpolation - str defining how the raster values are obtained (nearest, bilinear, bicubic)
+    Return:
+        samples - np.ndarray containing the N raster values at the provided positions
+    """
+
+    # Checking is the array is a np.ndarray or a rasterio object
+    if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
+        raise TypeError('Object must be of type np.ndarray or a rasterio object')
+
+    if isinstance(array, rasterio.io.DatasetReader):
+        array = array.read(1)
+
+    # Checking if the extent is a list
+    if not isinstance(extent, list):
+        raise TypeError('Extent must be of type list')
+
+    # Checking the length of the extent list
+    if not (len(extent) == 4 or len(extent) == 6):
+        raise ValueError('Too many values for the extent')
+
+    # Checking that all elements of the extent are of type int or float
+    if not all(isinstance(n, (int, float)) for n in extent):
+        raise TypeError('Extent values must be of type int or float')
+
+    # Checking if the interpolation method is of type string
+    if not isinstance(interpolation, str):
+        raise TypeError('Interpolation method must be of type string')
+
+    # Checking if the interpolation method is supported
+    if interpolation not in ['nearest', 'bilinear', 'bicubic']:
+        raise ValueError('Interpolation method must be one of nearest, bilinear or bicubic')
+
+    # Checking if the points are provided as np.ndarray or list
+    if not isinstance(points, (np.ndarray, list)):
+        raise TypeError('Points must be of type np.ndarray or list')
+
+    # Converting the points to an array of shape (N,2)
+    try:
+        points = np.asarray(points)
+    except ValueError:
+        raise ValueError('Points must be provided as array of shape (N,2)')
+
+    # Checking that all point coordinates are of type int or float
+    if points.dtype.kind not in 'iuf':
+        raise TypeError('Point values must be of type int or float')
+
+    points = points.astype(float, copy=False)
+
+    if points.ndim == 1:
+        points = points.reshape(1, -1)
+
+    # Checking the shape of the points array
+    if not (points.ndim == 2 and points.shape[1] == 2):
+        raise ValueError('Points must be provided as array of shape (N,2)')
+
+    x = points[:, 0]
+    y = points[:, 1]
+
+    # Checking if all points are located within the provided extent
+    if np.any((x < extent[0]) | (x > extent[1]) | (y < extent[2]) | (y > extent[3])):
+        raise ValueError('One or more points are located outside of the extent')
+
+    # Getting the column and row positions based on the extent and shape of the array
+    columns = (x - extent[0]) / (extent[1] - extent[0]) * array.shape[1]
+    rows = (y - extent[2]) / (extent[3] - extent[2]) * array.shape[0]
+
+    # Interpolation is based on the cell centers, positions outside of the centers are clamped to the border cells
+    if interpolation != 'nearest':
+        columns = columns - 0.5
+        rows = rows - 0.5
+
+    # Sampling the array at the given rows and columns, rows are counted from the bottom of the array
+    samples = _interpolate_points(array[::-1], rows, columns, interpolation)
+
+    return samples
+
+
+def _interpolate_points(array: np.ndarray,
+                        rows: np.ndarray,
+                        columns: np.ndarray,
+                        interpolation: str = 'nearest') -> np.ndarray:
+    """Gathering the values of an array at fractional row and column positions
+    Args:
+        array - np.ndarray containing the raster values
+        rows - np.ndarray containing the fractional row positions
+        columns - np.ndarray containing the fractional column positions
+        interpolation - str defining how the values are obtained (nearest, bilinear, bicubic)
+    Return:
+        samples - np.ndarray containing the values at the provided positions
+    """
+
+    # Positions outside of the array are assigned to the values of the border cells
+    rows = np.clip(rows, 0, array.shape[0] - 1)
+    columns = np.clip(columns, 0, array.shape[1] - 1)
+
+    if interpolation == 'nearest':
+        return array[np.rint(rows).astype(int), np.rint(columns).astype(int)]
+
+    # Getting the upper left cell of the stencil and the position within the cell
+    row0 = np.floor(rows).astype(int)
+    column0 = np.floor(columns).astype(int)
+    t = rows - row0
+    u = columns - column0
+
+    if interpolation == 'bilinear':
+        offsets = np.arange(0, 2)
+        weights_rows = np.stack([1 - t, t], axis=1)
+        weights_columns = np.stack([1 - u, u], axis=1)
+    else:
+        offsets = np.arange(-1, 3)
+        weights_rows = _cubic_weights(t)
+        weights_columns = _cubic_weights(u)
+
+    # Gathering the stencil of every point at once, indices at the borders are clamped
+    stencil_rows = np.clip(row0[:, None] + offsets, 0, array.shape[0] - 1)
+    stencil_columns = np.clip(column0[:, None] + offsets, 0, array.shape[1] - 1)
+    stencil = array[stencil_rows[:, :, None], stencil_columns[:, None, :]]
+
+    samples = np.einsum('ni,nij,nj->n', weights_rows, stencil, weights_columns)
+
+    return samples
+
+
+def _cubic_weights(t: np.ndarray) -> np.ndarray:
+    """Calculating the weights of the four cells of a cubic convolution (Catmull-Rom) stencil
+    Args:
+        t - np.ndarray containing the positions within the cells between 0 and 1
+    Return:
+        weights - np.ndarray of shape (N,4) containing the weights
+    """
+
+    t2 = t * t
+    t3 = t2 * t
+
+    weights = np.stack([-0.5 * t3 + t2 - 0.5 * t,
+                        1.5 * t3 - 2.5 * t2 + 1,
+                        -1.5 * t3 + 2 * t2 + 0.5 * t,
+                        0.5 * t3 - 0.5 * t2], axis=1)
+
+    return weights
+
+
+# Function tested
+def sample_blockwise(raster: rasterio.io.DatasetReader,
+                     points: Union[np.ndarray, List[List[Union[int, float]]]],
+                     interpolation: str = 'nearest',
+                     band: int = 1) -> np.ndarray:
+    """Sampling the raster values of a rasterio object at multiple points by reading only the internal blocks of the
+    raster that contain points. Each block is read once and all points located in it are sampled at once
+    Args:
+        raster - rasterio object containing the raster values
+        points - np.ndarray of shape (N,2) or list containing the x and y coordinates of the points in the CRS of
+        the raster
+        interpolation - str defining how the raster values are obtained (nearest, bilinear, bicubic)
+        band - int of the band to be sampled
+    Return:
+        samples - np.ndarray containing the N raster values at the provided positions
+    """
+
+    # Checking if the raster is a rasterio object
+    if not isinstance(raster, rasterio.io.DatasetReader):
+        raise TypeError('Raster must be a rasterio object')
+
+    # Checking if the interpolation method is of type string
+    if not isinstance(interpolation, str):
+        raise TypeError('Interpolation method must be of type string')
+
+    # Checking if the interpolation method is supported
+    if interpolation not in ['nearest', 'bilinear', 'bicubic']:
+        raise ValueError('Interpolation method must be one of nearest, bilinear or bicubic')
+
+    # Checking if the band is of type int
+    if not isinstance(band, int):
+        raise TypeError('Band must be of type int')
+
+    # Converting the points to an array of shape (N,2)
+    points = np.asarray(points)
+
+    # Checking that all point coordinates are of type int or float
+    if points.dtype.kind not in 'iuf':
+        raise TypeError('Point values must be of type int or float')
+
+    points = points.astype(float, copy=False).reshape(-1, 2)
+
+    # Getting the fractional column and row positions of the points
+    inverse = ~raster.transform
+    columns = inverse.a * points[:, 0] + inverse.b * points[:, 1] + inverse.c
+    rows = inverse.d * points[:, 0] + inverse.e * points[:, 1] + inverse.f
+
+    # Checking if all points are located within the raster
+    if np.any((columns < 0) | (columns > raster.width) | (rows < 0) | (rows > raster.height)):
+        raise ValueError('One or more points are located outside the boundaries of the raster')
+
+    # Nearest neighbour sampling uses the cell containing the point, interpolation is based on the cell centers
+    if interpolation == 'nearest':
+        rows = np.minimum(np.floor(rows), raster.height - 1)
+        columns = np.minimum(np.floor(columns), raster.width - 1)
+        halo = 0
+    else:
+        rows = rows - 0.5
+        columns = columns - 0.5
+        halo = 1 if interpolation == 'bilinear' else 2
+
+    # Getting the internal block shape, strips are merged to blocks of at least 256 rows
+    block_height, block_width = _block_shape(raster, band)
+
+    # Assigning every point to the block that contains its cell
+    block_rows = np.clip(np.floor(rows), 0, raster.height - 1).astype(int) // block_height
+    block_columns = np.clip(np.floor(columns), 0, raster.width - 1).astype(int) // block_width
+    block_ids = block_rows * (raster.width // block_width + 1) + block_columns
+
+    # Sorting the points by block to read the blocks sequentially
+    order = np.argsort(block_ids, kind='stable')
+    blocks, starts = np.unique(block_ids[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+
+    samples = np.empty(len(points), dtype=raster.dtypes[band - 1] if interpolation == 'nearest' else float)
+
+    for start, end in zip(starts, ends):
+        index = order[start:end]
+
+        # Creating the window of the block including a halo for the interpolation stencil
+        row_off = max(block_rows[index[0]] * block_height - halo, 0)
+        col_off = max(block_columns[index[0]] * block_width - halo, 0)
+        row_end = min((block_rows[index[0]] + 1) * block_height + halo, raster.height)
+        col_end = min((block_columns[index[0]] + 1) * block_width + halo, raster.width)
+
+        # Reading the block and sampling all points located in it
+        tile = raster.read(band, window=Window(col_off, row_off, col_end - col_off, row_end - row_off))
+        samples[index] = _interpolate_points(tile, rows[index] - row_off, columns[index] - col_off, interpolation)
+
+    return samples
+
+
+def _block_shape(raster: rasterio.io.DatasetReader, band: int = 1) -> tuple:
+    """Getting the shape of the blocks a raster is read in. Contiguous strips of striped rasters are merged to blocks
+    of at least 256 rows so that they are not read one by one
+    Args:
+        raster - rasterio object
+        band - int of the band to be read
+    Return:
+        tuple - int of the number of rows and int of the number of columns of a block
+    """
+
+    block_height, block_width = raster.block_shapes[band - 1]
+    block_height = block_height * max(1, 256 // block_height)
+
+    return block_height, block_width
+
+
 # Function tested
 def sample_randomly(array: np.ndarray, extent: list, **kwargs) -> tuple:
     """Sampling randomly from a raster using sample_from_raster and a randomly drawn point
@@ -107,13 +380,21 @@ def sample_randomly(array: np.ndarray, extent: list, **kwargs) -> tuple:
         array - np.ndarray containing the raster values
         extent - list containing the values for the extent of the array (minx,maxx,miny,maxy)
     Kwargs:
-        seed - int setting a seed for the random variable for reproducability
+        seed - int or np.random.Generator setting a seed for the random variable for reproducability
+        random_samples - int of the number of samples drawn at once, if provided arrays of all samples are returned
+        interpolation - str defining how the raster values are obtained (nearest, bilinear, bicubic)
+        strategy - str defining how the points are distributed (uniform, stratified, poisson, weighted)
+        weights - np.ndarray with the sampling weights of the raster cells or 'slope' for the weighted strategy
+        radius - int or float of the minimum distance between points for the poisson strategy
     Return:
         tuple - float of sampled raster value and list containing the x- and y-coordinates of the point where the
-        sample was drawn
+        sample was drawn, or np.ndarray of the sampled raster values and np.ndarray of shape (N,2) containing the
+        x- and y-coordinates of the points if random_samples is provided
     """
 
     seed = kwargs.get('seed', None)
+    random_samples = kwargs.get('random_samples', None)
+    interpolation = kwargs.get('interpolation', 'nearest')
 
     # Checking if the array is of type np.ndarras
     if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
@@ -130,33 +411,272 @@ def sample_randomly(array: np.ndarray, extent: list, **kwargs) -> tuple:
     if not all(isinstance(n, (int, float)) for n in extent):
         raise TypeError('Extent values must be of type int or float')
 
-    # Checking that if a seed was provided that the seed is of type int
-    if seed is not None:
-        if not isinstance(seed, int):
-            raise TypeError('Seed must be of type int')
-        np.random.seed(seed)
+    # Checking if the number of samples is of type int
+    if not isinstance(random_samples, (int, type(None))):
+        raise TypeError('Number of samples must be of type int')
 
-    # Drawing random values x and y within the provided extent
-    x = np.random.uniform(extent[0], extent[1], 1)[0]
-    y = np.random.uniform(extent[2], extent[3], 1)[0]
+    # Drawing all points at once
+    points = _draw_random_points(extent, 1 if random_samples is None else random_samples, seed,
+                                 **_get_strategy_kwargs(array, extent, kwargs))
 
-    # Checking if the drawn values are floats
-    if not isinstance(x, float):
-        raise TypeError('x must be of type float')
-    if not isinstance(y, float):
-        raise TypeError('y must be of type float')
+    # Sampling from the provided array at all points at once
+    samples = sample_points(array, extent, points, interpolation=interpolation)
 
-    # Creating a point list
-    point = [x, y]
+    if random_samples is None:
+        return float(samples[0]), [float(points[0, 0]), float(points[0, 1])]
 
-    # Checking if the point list is of type list
-    if not isinstance(point, list):
-        raise TypeError('Point must be of type list')
+    return samples, points
+
+
+def _draw_random_points(extent: List[Union[int, float]],
+                        random_samples: int,
+                        seed: Union[int, np.random.Generator, type(None)] = None,
+                        strategy: str = 'uniform',
+                        weights: np.ndarray = None,
+                        radius: Union[int, float] = None) -> np.ndarray:
+    """Drawing random points within an extent
+    Args:
+        extent - list containing the values for the extent (minx,maxx,miny,maxy)
+        random_samples - int of the number of points
+        seed - int or np.random.Generator setting a seed for the random variable for reproducability
+        strategy - str defining how the points are distributed (uniform, stratified, poisson, weighted)
+        weights - np.ndarray with non-negative sampling weights of the raster cells for the weighted strategy
+        radius - int or float of the minimum distance between points for the poisson strategy
+    Return:
+        points - np.ndarray of shape (N,2) containing the x- and y-coordinates of the points
+    """
+
+    # Checking that if a seed was provided that the seed is of type int or a random generator
+    if seed is not None and not isinstance(seed, (int, np.random.Generator)):
+        raise TypeError('Seed must be of type int')
+
+    # Checking that the number of samples is positive
+    if random_samples < 1:
+        raise ValueError('Number of samples must be larger than 0')
+
+    # Checking that the strategy is of type string
+    if not isinstance(strategy, str):
+        raise TypeError('Sampling strategy must be of type string')
+
+    # Checking that the strategy is supported
+    if strategy not in ['uniform', 'stratified', 'poisson', 'weighted']:
+        raise ValueError('Sampling strategy must be one of uniform, stratified, poisson or weighted')
+
+    rng = np.random.default_rng(seed)
+
+    if strategy == 'stratified':
+        points = _draw_stratified_points(extent, random_samples, rng)
+    elif strategy == 'poisson':
+        points = _draw_poisson_points(extent, random_samples, rng, radius)
+    elif strategy == 'weighted':
+        points = _draw_weighted_points(extent, random_samples, rng, weights)
+    else:
+        # Drawing random values x and y within the provided extent
+        points = rng.uniform(low=[extent[0], extent[2]], high=[extent[1], extent[3]], size=(random_samples, 2))
+
+    return points
+
+
+def _draw_stratified_points(extent: List[Union[int, float]],
+                            random_samples: int,
+                            rng: np.random.Generator) -> np.ndarray:
+    """Drawing one jittered point in each of random_samples randomly chosen cells of a regular grid covering the
+    extent
+    Args:
+        extent - list containing the values for the extent (minx,maxx,miny,maxy)
+        random_samples - int of the number of points
+        rng - np.random.Generator used to draw the points
+    Return:
+        points - np.ndarray of shape (N,2) containing the x- and y-coordinates of the points
+    """
+
+    width = extent[1] - extent[0]
+    height = extent[3] - extent[2]
 
-    # Sampling from the provided array and the random point
-    samp = sample(array, extent, point)
+    # Creating a grid of approximately square cells with at least one cell per sample
+    rows = max(1, int(round(np.sqrt(random_samples * height / width)))) if width > 0 else random_samples
+    cols = int(np.ceil(random_samples / rows))
 
-    return samp, [x, y]
+    # Choosing the cells without replacement and drawing one point per cell
+    cells = rng.choice(rows * cols, size=random_samples, replace=False)
+    row, col = np.divmod(cells, cols)
+    offsets = rng.random((random_samples, 2))
+
+    points = np.column_stack([extent[0] + (col + offsets[:, 0]) * width / cols,
+                              extent[2] + (row + offsets[:, 1]) * height / rows])
+
+    return points
+
+
+def _draw_poisson_points(extent: List[Union[int, float]],
+                         random_samples: int,
+                         rng: np.random.Generator,
+                         radius: Union[int, float] = None,
+                         attempts: int = 10) -> np.ndarray:
+    """Drawing points with a minimum distance to each other (Poisson-disk sampling). The points are hashed into a
+    grid with a cell size of radius/sqrt(2) so that each cell holds at most one point. Candidates are drawn for all
+    empty cells of one of nine interleaved phases at once as cells of the same phase are too far apart to conflict
+    with each other
+    Args:
+        extent - list containing the values for the extent (minx,maxx,miny,maxy)
+        random_samples - int of the maximum number of points
+        rng - np.random.Generator used to draw the points
+        radius - int or float of the minimum distance between points, by default derived from the number of samples
+        attempts - int of the number of candidates drawn per cell
+    Return:
+        points - np.ndarray of shape (N,2) containing the x- and y-coordinates of at most random_samples points
+    """
+
+    width = extent[1] - extent[0]
+    height = extent[3] - extent[2]
+
+    # Deriving a radius that yields slightly more points than requested when the extent is filled
+    if radius is None:
+        radius = 0.7 * np.sqrt(width * height / random_samples)
+
+    # Checking that the radius is of type int or float
+    if not isinstance(radius, (int, float)):
+        raise TypeError('Radius must be of type int or float')
+
+    # Checking that the radius is positive
+    if radius <= 0:
+        raise ValueError('Radius must be larger than 0')
+
+    cell = radius / np.sqrt(2)
+    rows = max(1, int(np.ceil(height / cell)))
+    cols = max(1, int(np.ceil(width / cell)))
+
+    # Creating the spatial hash storing the index of the point in each cell, padded by two empty cells
+    grid = np.full((rows + 4, cols + 4), -1, dtype=np.int64)
+    points = np.empty((rows * cols, 2))
+    count = 0
+
+    offsets = [(i, j) for i in range(-2, 3) for j in range(-2, 3) if not (i == 0 and j == 0)]
+
+    for attempt in range(attempts):
+        placed = count
+
+        for phase_row in range(3):
+            for phase_col in range(3):
+
+                # Getting the empty cells of the current phase
+                row, col = np.meshgrid(np.arange(phase_row, rows, 3) + 2,
+                                       np.arange(phase_col, cols, 3) + 2, indexing='ij')
+                empty = grid[row, col] < 0
+                row = row[empty]
+                col = col[empty]
+
+                if len(row) == 0:
+                    continue
+
+                # Drawing one candidate per empty cell
+                candidates = np.column_stack([extent[0] + (col - 2 + rng.random(len(col))) * cell,
+                                              extent[2] + (row - 2 + rng.random(len(row))) * cell])
+
+                accepted = (candidates[:, 0] <= extent[1]) & (candidates[:, 1] <= extent[3])
+
+                # Rejecting candidates closer than the radius to points in the neighbouring cells
+                for i, j in offsets:
+                    index = grid[row + i, col + j]
+                    occupied = np.flatnonzero(index >= 0)
+                    distance = np.sum((points[index[occupied]] - candidates[occupied]) ** 2, axis=1)
+                    accepted[occupied[distance < radius ** 2]] = False
+
+                # Adding the accepted candidates to the spatial hash
+                number = np.count_nonzero(accepted)
+                points[count:count + number] = candidates[accepted]
+                grid[row[accepted], col[accepted]] = np.arange(count, count + number)
+                count += number
+
+        # Stopping if the extent is saturated
+        if count == placed:
+            break
+
+    # Selecting a random subset if more points than requested were placed
+    points = points[rng.permutation(count)[:random_samples]]
+
+    return points
+
+
+def _draw_weighted_points(extent: List[Union[int, float]],
+                          random_samples: int,
+                          rng: np.random.Generator,
+                          weights: np.ndarray) -> np.ndarray:
+    """Drawing points with a probability proportional to the weights of the raster cells they fall into
+    Args:
+        extent - list containing the values for the extent (minx,maxx,miny,maxy)
+        random_samples - int of the number of points
+        rng - np.random.Generator used to draw the points
+        weights - np.ndarray with non-negative sampling weights of the raster cells, NaN values are treated as 0
+    Return:
+        points - np.ndarray of shape (N,2) containing the x- and y-coordinates of the points
+    """
+
+    # Checking that the weights are of type np.ndarray
+    if not isinstance(weights, np.ndarray):
+        raise TypeError('Weights must be provided as np.ndarray for the weighted strategy')
+
+    # Checking that the weights are two dimensional
+    if weights.ndim != 2:
+        raise ValueError('Weights must be a 2D array')
+
+    weights = np.nan_to_num(weights.astype(float), nan=0.0)
+
+    # Checking that the weights are non-negative
+    if np.any(weights < 0):
+        raise ValueError('Weights must be non-negative')
+
+    cumulative = np.cumsum(weights.ravel())
+
+    # Checking that not all weights are zero
+    if cumulative[-1] <= 0:
+        raise ValueError('Weights must not all be zero')
+
+    # Drawing the cells by inverting the cumulative distribution of the weights
+    cells = np.searchsorted(cumulative, rng.uniform(0, cumulative[-1], random_samples), side='right')
+    cells = np.minimum(cells, len(cumulative) - 1)
+    row, col = np.divmod(cells, weights.shape[1])
+    offsets = rng.random((random_samples, 2))
+
+    # Drawing the points within the cells, the first row of the array represents the top of the extent
+    res_x = (extent[1] - extent[0]) / weights.shape[1]
+    res_y = (extent[3] - extent[2]) / weights.shape[0]
+
+    points = np.column_stack([extent[0] + (col + offsets[:, 0]) * res_x,
+                              extent[3] - (row + offsets[:, 1]) * res_y])
+
+    return points
+
+
+def _get_strategy_kwargs(array: Union[np.ndarray, rasterio.io.DatasetReader],
+                         extent: List[Union[int, float]],
+                         kwargs: dict,
+                         slope: np.ndarray = None) -> dict:
+    """Getting the sampling strategy arguments from the kwargs of the sampling functions
+    Args:
+        array - np.ndarray or rasterio object containing the raster values
+        extent - list containing the values for the extent of the array (minx,maxx,miny,maxy)
+        kwargs - dict containing the kwargs passed to the sampling function
+        slope - np.ndarray containing the already calculated slope of the array
+    Return:
+        dict - containing the strategy, weights and radius passed to _draw_random_points
+    """
+
+    weights = kwargs.get('weights', None)
+
+    # Checking that the weights are of type np.ndarray or string
+    if not isinstance(weights, (np.ndarray, str, type(None))):
+        raise TypeError('Weights must be of type np.ndarray or string')
+
+    # Calculating the slope of the array as weights
+    if isinstance(weights, str):
+        if weights != 'slope':
+            raise ValueError('Weights must be provided as np.ndarray or slope')
+        weights = slope if slope is not None else calculate_slope(array, extent)
+
+    return {'strategy': kwargs.get('strategy', 'uniform'),
+            'weights': weights,
+            'radius': kwargs.get('radius', None)}
 
 
 # Function tested
@@ -214,19 +734,7 @@ def calculate_hillshades(array: np.ndarray, extent: List[Union[int, float]] = No
         raise ValueError('azdeg must be between 0 and 360 degrees')
 
     # Calculate hillshades
-    azdeg = 360 - azdeg
-    x, y = np.gradient(array)
-    x = x / res[0]
-    y = y / res[1]
-    slope = np.pi / 2. - np.arctan(np.sqrt(x * x + y * y))
-    aspect = np.arctan2(-x, y)
-    azimuthrad = azdeg * np.pi / 180.
-    altituderad = altdeg * np.pi / 180.
-
-    shaded = np.sin(altituderad) * np.sin(slope) + np.cos(altituderad) * np.cos(slope) * np.cos(
-        (azimuthrad - np.pi / 2.) - aspect)
-
-    hillshades = 255 * (shaded + 1) / 2
+    hillshades = _calculate_terrain_derivatives(array, res, ['hillshade'], azdeg=azdeg, altdeg=altdeg)['hillshade']
 
     return hillshades
 
@@ -267,11 +775,7 @@ def calculate_slope(array: Union[np.ndarray, rasterio.io.DatasetReader],
         raise ValueError('Array must be of dimension 2')
 
     # Calculate slope
-    y, x = np.gradient(array)
-    x = x / res[0]
-    y = y / res[1]
-    slope = np.arctan(np.sqrt(x * x + y * y))
-    slope = slope * (180 / np.pi)
+    slope = _calculate_terrain_derivatives(array, res, ['slope'])['slope']
 
     return slope
 
@@ -311,16 +815,398 @@ def calculate_aspect(array: np.ndarray, extent: List[Union[int, float]] = None)
         raise ValueError('Array must be of dimension 2')
 
     # Calculate aspect
-    y, x = np.gradient(array)
-    x = x / res[0]
-    y = y / res[1]
-    aspect = np.arctan2(-x, y)
-    aspect = aspect * (180 / np.pi)
-    aspect = aspect % 360.0
+    aspect = _calculate_terrain_derivatives(array, res, ['aspect'])['aspect']
 
     return aspect
 
 
+# Function tested
+def calculate_terrain_derivatives(array: Union[np.ndarray, rasterio.io.DatasetReader],
+                                  extent: List[Union[int, float]] = None,
+                                  derivatives: List[str] = None,
+                                  **kwargs) -> dict:
+    """Calculate several terrain derivatives of a digital elevation model from a single gradient calculation
+    Args:
+        array: np.ndarray or rasterio object containing the elevation data
+        extent: list containing the bounds of the array, must be provided for np.ndarrays
+        derivatives: list of the derivatives to be calculated (slope, aspect, hillshade, curvature), default is
+        slope, aspect and hillshade
+    Kwargs:
+        azdeg: int, float of light source direction for the hillshades
+        altdeg: int, float of light source height for the hillshades
+        dtype: str or np.dtype of the precision of the calculation and the output arrays, i.e. 'float32'
+    Return:
+        derivatives_dict: dict containing the np.ndarrays of the requested derivatives, the values correspond to the
+        ones of calculate_slope, calculate_aspect and calculate_hillshades, the curvature is the laplacian of the
+        elevation
+    """
+
+    # Checking if object is of type np.ndarray or a rasterio object
+    if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
+        raise TypeError('Input object must be of type np.ndarray or a rasterio object')
+
+    # Checking if extent is of type list
+    if not isinstance(extent, (type(None), list)):
+        raise TypeError('Extent must be of type list')
+
+    # Setting the default derivatives
+    if derivatives is None:
+        derivatives = ['slope', 'aspect', 'hillshade']
+
+    # Checking if the derivatives are provided as list of strings
+    if not isinstance(derivatives, list) or not all(isinstance(n, str) for n in derivatives):
+        raise TypeError('Derivatives must be provided as list of strings')
+
+    # Checking if the derivatives are supported
+    if not all(n in ['slope', 'aspect', 'hillshade', 'curvature'] for n in derivatives):
+        raise ValueError('Derivatives must be one of slope, aspect, hillshade or curvature')
+
+    azdeg = kwargs.get('azdeg', 225)
+    altdeg = kwargs.get('altdeg', 45)
+    dtype = kwargs.get('dtype', None)
+
+    # Checking that altdeg and azdeg are of type float or int
+    if not isinstance(altdeg, (float, int)) or not isinstance(azdeg, (float, int)):
+        raise TypeError('altdeg and azdeg must be of type int or float')
+
+    # Checking that altdeg is not out of bounds
+    if altdeg > 90 or altdeg < 0:
+        raise ValueError('altdeg must be between 0 and 90 degrees')
+
+    # Checking that azdeg is not out of bounds
+    if azdeg > 360 or azdeg < 0:
+        raise ValueError('azdeg must be between 0 and 360 degrees')
+
+    # Checking if object is rasterio object
+    if isinstance(array, rasterio.io.DatasetReader):
+        # Getting resolution of raster
+        res = array.res
+        array = array.read(1)
+        flip = False
+    else:
+        # Checking that the extent is provided for np.ndarrays
+        if extent is None:
+            raise ValueError('Extent must be provided for np.ndarrays')
+
+        # Calculating resolution of raster based on extent and shape of array
+        res1 = (extent[1] - extent[0]) / array.shape[1]
+        res2 = (extent[3] - extent[2]) / array.shape[0]
+        res = [res1, res2]
+        flip = True
+
+    # Checking if dimension of array is correct
+    if not array.ndim == 2:
+        raise ValueError('Array must be of dimension 2')
+
+    derivatives_dict = _calculate_terrain_derivatives(array, res, derivatives, flip_aspect=flip, azdeg=azdeg,
+                                                      altdeg=altdeg, dtype=dtype)
+
+    return derivatives_dict
+
+
+def _calculate_terrain_derivatives(array: np.ndarray,
+                                   res: List[Union[int, float]],
+                                   derivatives: List[str],
+                                   flip_aspect: bool = False,
+                                   azdeg: Union[int, float] = 225,
+                                   altdeg: Union[int, float] = 45,
+                                   dtype=None) -> dict:
+    """Calculate terrain derivatives of an elevation array from a single gradient calculation
+    Args:
+        array: np.ndarray containing the elevation data
+        res: list containing the resolution of the array in x and y direction
+        derivatives: list of the derivatives to be calculated (slope, aspect, hillshade, curvature)
+        flip_aspect: bool if the aspect is supposed to be calculated for the vertically flipped array
+        azdeg: int, float of light source direction for the hillshades
+        altdeg: int, float of light source height for the hillshades
+        dtype: precision of the calculation and the output arrays
+    Return:
+        derivatives_dict: dict containing the np.ndarrays of the requested derivatives
+    """
+
+    # Converting the elevation values to the requested precision
+    if dtype is not None:
+        array = array.astype(dtype, copy=False)
+
+    # Calculating the gradient along the rows and columns once for all derivatives
+    gradient_rows, gradient_columns = np.gradient(array)
+
+    derivatives_dict = {}
+
+    if 'slope' in derivatives:
+        x = gradient_columns / res[0]
+        y = gradient_rows / res[1]
+        slope = np.multiply(x, x, out=x)
+        slope += np.multiply(y, y, out=y)
+        np.sqrt(slope, out=slope)
+        np.arctan(slope, out=slope)
+        slope *= (180 / np.pi)
+        derivatives_dict['slope'] = slope
+
+    if 'aspect' in derivatives:
+        x = gradient_columns / res[0]
+        # The gradient along the rows of the flipped array is the negative gradient of the array
+        if flip_aspect:
+            y = np.subtract(0.0, gradient_rows, dtype=gradient_rows.dtype) / res[1]
+        else:
+            y = gradient_rows / res[1]
+        aspect = np.arctan2(np.negative(x, out=x), y, out=y)
+        aspect *= (180 / np.pi)
+        np.mod(aspect, 360.0, out=aspect)
+        derivatives_dict['aspect'] = np.flipud(aspect) if flip_aspect else aspect
+
+    if 'hillshade' in derivatives:
+        x = gradient_rows / res[0]
+        y = gradient_columns / res[1]
+        slope = np.pi / 2. - np.arctan(np.sqrt(x * x + y * y))
+        aspect = np.arctan2(np.negative(x, out=x), y, out=y)
+        azimuthrad = (360 - azdeg) * np.pi / 180.
+        altituderad = altdeg * np.pi / 180.
+
+        shaded = np.sin(altituderad) * np.sin(slope) + np.cos(altituderad) * np.cos(slope) * np.cos(
+            (azimuthrad - np.pi / 2.) - aspect)
+
+        derivatives_dict['hillshade'] = 255 * (shaded + 1) / 2
+
+    if 'curvature' in derivatives:
+        curvature = np.gradient(gradient_columns, axis=1) / res[0] ** 2
+        curvature += np.gradient(gradient_rows, axis=0) / res[1] ** 2
+        derivatives_dict['curvature'] = curvature
+
+    return derivatives_dict
+
+
+# Function tested
+def calculate_terrain_derivatives_tiled(raster: rasterio.io.DatasetReader,
+                                        path: str,
+                                        derivatives: List[str] = None,
+                                        tile_size: int = 512,
+                                        **kwargs):
+    """Calculate terrain derivatives of a digital elevation model tile by tile and write them to a GeoTIFF. The tiles
+    are read with a halo of neighbouring cells so that the result is identical to calculate_terrain_derivatives
+    without seams between the tiles while only one tile is kept in memory
+    Args:
+        raster: rasterio object containing the elevation data
+        path: str with the path where the GeoTIFF containing one band per derivative will be saved
+        derivatives: list of the derivatives to be calculated (slope, aspect, hillshade, curvature), default is
+        slope, aspect and hillshade
+        tile_size: int of the number of rows and columns of each tile
+    Kwargs:
+        azdeg: int, float of light source direction for the hillshades
+        altdeg: int, float of light source height for the hillshades
+        dtype: str or np.dtype of the output GeoTIFF, default is 'float32'
+        workers: int of the number of tiles processed in parallel, default is 1
+        executor: str if the tiles are processed by a 'thread' or a 'process' pool, default is 'thread'
+    """
+
+    # Checking if the raster is a rasterio object
+    if not isinstance(raster, rasterio.io.DatasetReader):
+        raise TypeError('Raster must be a rasterio object')
+
+    # Checking if path is of type string
+    if not isinstance(path, str):
+        raise TypeError('Path must be of type string')
+
+    # Setting the default derivatives
+    if derivatives is None:
+        derivatives = ['slope', 'aspect', 'hillshade']
+
+    # Checking if the derivatives are provided as list of strings
+    if not isinstance(derivatives, list) or not all(isinstance(n, str) for n in derivatives):
+        raise TypeError('Derivatives must be provided as list of strings')
+
+    # Checking if the derivatives are supported
+    if not all(n in ['slope', 'aspect', 'hillshade', 'curvature'] for n in derivatives):
+        raise ValueError('Derivatives must be one of slope, aspect, hillshade or curvature')
+
+    # Checking if the tile size is of type int
+    if not isinstance(tile_size, int):
+        raise TypeError('Tile size must be of type int')
+
+    # Checking that the tile size is positive
+    if tile_size < 1:
+        raise ValueError('Tile size must be larger than 0')
+
+    azdeg = kwargs.get('azdeg', 225)
+    altdeg = kwargs.get('altdeg', 45)
+    dtype = kwargs.get('dtype', 'float32')
+
+    # Checking that altdeg and azdeg are of type float or int
+    if not isinstance(altdeg, (float, int)) or not isinstance(azdeg, (float, int)):
+        raise TypeError('altdeg and azdeg must be of type int or float')
+
+    workers, executor = _check_workers(kwargs.get('workers', 1), kwargs.get('executor', 'thread'))
+
+    # The curvature is calculated from the gradient of the gradient and requires a larger halo
+    halo = 2 if 'curvature' in derivatives else 1
+
+    # Creating the meta data of the output GeoTIFF with one band per derivative
+    meta = {'driver': 'GTiff',
+            'height': raster.height,
+            'width': raster.width,
+            'count': len(derivatives),
+            'dtype': dtype,
+            'crs': raster.crs,
+            'transform': raster.transform}
+
+    # Using internal tiles matching the processing tiles if the tile size is a valid GeoTIFF block size
+    if tile_size % 16 == 0:
+        meta.update({'tiled': True, 'blockxsize': tile_size, 'blockysize': tile_size})
+
+    with rasterio.open(path, 'w', **meta) as dst:
+        for i, derivative in enumerate(derivatives):
+            dst.set_band_description(i + 1, derivative)
+
+        function = partial(_calculate_terrain_tile,
+                           res=raster.res,
+                           derivatives=derivatives,
+                           azdeg=azdeg,
+                           altdeg=altdeg,
+                           dtype=dtype)
+
+        # Reading the tiles including the halo in the main thread
+        def tiles():
+            for window in _iterate_windows(raster.height, raster.width, tile_size):
+                window_halo, inner = _add_halo(window, halo, raster.height, raster.width)
+                yield window, (raster.read(1, window=window_halo), inner)
+
+        # Calculating the derivatives, removing the halo and writing the tiles in order
+        for window, tile_derivatives in _map_tiles(function, tiles(), workers, executor):
+            dst.write(tile_derivatives, window=window)
+
+
+def _calculate_terrain_tile(tile: np.ndarray,
+                            inner: tuple,
+                            res: List[Union[int, float]],
+                            derivatives: List[str],
+                            azdeg: Union[int, float],
+                            altdeg: Union[int, float],
+                            dtype) -> np.ndarray:
+    """Calculate the terrain derivatives of a tile read with a halo and stack them to a 3D array without the halo
+    Args:
+        tile: np.ndarray containing the elevation data of the tile including the halo
+        inner: tuple of slices selecting the tile without the halo
+        res: list containing the resolution of the tile in x and y direction
+        derivatives: list of the derivatives to be calculated (slope, aspect, hillshade, curvature)
+        azdeg: int, float of light source direction for the hillshades
+        altdeg: int, float of light source height for the hillshades
+        dtype: dtype of the returned array
+    Return:
+        stack: np.ndarray of shape (len(derivatives), rows, columns) containing the derivatives
+    """
+
+    tile_derivatives = _calculate_terrain_derivatives(tile, res, derivatives, azdeg=azdeg, altdeg=altdeg)
+
+    stack = np.stack([tile_derivatives[derivative][inner] for derivative in derivatives]).astype(dtype, copy=False)
+
+    return stack
+
+
+def _iterate_windows(height: int, width: int, tile_size: int):
+    """Iterating over the windows of a raster tile by tile in row major order
+    Args:
+        height: int of the number of rows of the raster
+        width: int of the number of columns of the raster
+        tile_size: int of the number of rows and columns of each tile
+    Return:
+        window: rasterio.windows.Window of the current tile
+    """
+
+    for row_off in range(0, height, tile_size):
+        for col_off in range(0, width, tile_size):
+            yield Window(col_off, row_off, min(tile_size, width - col_off), min(tile_size, height - row_off))
+
+
+def _check_workers(workers: int, executor: str) -> tuple:
+    """Checking the number of workers and the type of executor used to process tiles in parallel
+    Args:
+        workers: int of the number of tiles processed in parallel
+        executor: str if the tiles are processed by a 'thread' or a 'process' pool
+    Return:
+        workers: int of the number of tiles processed in parallel
+        executor: str if the tiles are processed by a 'thread' or a 'process' pool
+    """
+
+    # Checking if the number of workers is of type int
+    if not isinstance(workers, int):
+        raise TypeError('Number of workers must be of type int')
+
+    # Checking that the number of workers is positive
+    if workers < 1:
+        raise ValueError('Number of workers must be larger than 0')
+
+    # Checking if the executor is of type string
+    if not isinstance(executor, str):
+        raise TypeError('Executor must be of type string')
+
+    # Checking if the executor is supported
+    if executor not in ['thread', 'process']:
+        raise ValueError('Executor must be either thread or process')
+
+    return workers, executor
+
+
+def _map_tiles(function, tiles, workers: int = 1, executor: str = 'thread'):
+    """Applying a function to tiles in parallel and yielding the results in the order of the tiles. NumPy releases
+    the GIL for large arrays so that threads usually suffice, processes require a picklable function. The tiles are
+    read lazily and only a limited number of tiles is submitted at once so that the memory stays bounded
+    Args:
+        function: callable applied to the arguments of each tile
+        tiles: iterable of tuples containing the window and a tuple of arguments of each tile
+        workers: int of the number of tiles processed in parallel
+        executor: str if the tiles are processed by a 'thread' or a 'process' pool
+    Return:
+        window: rasterio.windows.Window of the tile
+        result: result of the function applied to the tile
+    """
+
+    # Processing the tiles sequentially
+    if workers == 1:
+        for window, args in tiles:
+            yield window, function(*args)
+        return
+
+    pool_executor = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+
+    with pool_executor(max_workers=workers) as pool:
+        pending = deque()
+        for window, args in tiles:
+            pending.append((window, pool.submit(function, *args)))
+
+            # Waiting for the oldest tile if too many tiles are in flight
+            if len(pending) >= 2 * workers:
+                window, future = pending.popleft()
+                yield window, future.result()
+
+        while pending:
+            window, future = pending.popleft()
+            yield window, future.result()
+
+
+def _add_halo(window: Window, halo: int, height: int, width: int) -> tuple:
+    """Extending a window by a halo of neighbouring cells that is limited by the boundaries of the raster
+    Args:
+        window: rasterio.windows.Window to be extended
+        halo: int of the number of cells added at each side of the window
+        height: int of the number of rows of the raster
+        width: int of the number of columns of the raster
+    Return:
+        window_halo: rasterio.windows.Window including the halo
+        inner: tuple of slices selecting the original window within the extended window
+    """
+
+    row_off = max(window.row_off - halo, 0)
+    col_off = max(window.col_off - halo, 0)
+    row_end = min(window.row_off + window.height + halo, height)
+    col_end = min(window.col_off + window.width + halo, width)
+
+    window_halo = Window(col_off, row_off, col_end - col_off, row_end - row_off)
+    inner = (slice(window.row_off - row_off, window.row_off - row_off + window.height),
+             slice(window.col_off - col_off, window.col_off - col_off + window.width))
+
+    return window_halo, inner
+
+
 # Function tested
 def sample_orientations(array: Union[np.ndarray, rasterio.io.DatasetReader],
                         extent: List[Union[int, float]],
@@ -333,11 +1219,20 @@ def sample_orientations(array: Union[np.ndarray, rasterio.io.DatasetReader],
         random_samples: int/number of random samples to be drawn
     Kwargs:
         points: list containing coordinates of points
-        seed: int for the random seed
+        seed: int or np.random.Generator for the random seed
+        interpolation: str defining how the values are sampled at the points (nearest, bilinear, bicubic)
+        strategy: str defining how random points are distributed (uniform, stratified, poisson, weighted)
+        weights: np.ndarray with the sampling weights of the raster cells or 'slope' for the weighted strategy
+        radius: int or float of the minimum distance between points for the poisson strategy
+        adaptive: bool if random points are placed where the slope is strong and the aspect is coherent
+        window: int of the size of the moving window used to calculate the coherence and variance, default 5
+        thinning: float of the quantile of the local height variance below which no points are placed, default 0.25
+        min_coherence: float between 0 and 1 of the minimum aspect coherence of a retained point, default 0.8
     """
 
     points = kwargs.get('points', None)
     seed = kwargs.get('seed', 1)
+    adaptive = kwargs.get('adaptive', False)
 
     if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
         raise TypeError('Raster must be of type np.ndarray or a rasterio object')
@@ -351,316 +1246,767 @@ def sample_orientations(array: Union[np.ndarray, rasterio.io.DatasetReader],
     if not isinstance(points, (type(None), list)):
         raise TypeError('Number of points must be of type int or float')
 
-    if not isinstance(seed, (type(None), int)):
+    if not isinstance(seed, (type(None), int, np.random.Generator)):
         raise TypeError('Seed must be of type int')
 
-    # Calculate slope and aspect of array
-    slope = calculate_slope(array, extent)
-    aspect = calculate_aspect(array, extent)
+    if not isinstance(adaptive, bool):
+        raise TypeError('Adaptive must be either True or False')
+
+    # Calculate slope and aspect of array from a single gradient calculation
+    derivatives = calculate_terrain_derivatives(array, extent, ['slope', 'aspect'])
+    slope = derivatives['slope']
+    aspect = derivatives['aspect']
+
+    # Reading the height values only once, the aspect of np.ndarrays is returned vertically flipped
+    if isinstance(array, rasterio.io.DatasetReader):
+        array = array.read(1)
+        aspect_aligned = aspect
+    else:
+        aspect_aligned = np.flipud(aspect)
+
+    # Drawing points where the slope is strong and coherent and removing points with incoherent aspects
+    if points is None and adaptive:
+        weights, coherence = _calculate_orientation_weights(array, slope, aspect_aligned,
+                                                            window=kwargs.get('window', 5),
+                                                            thinning=kwargs.get('thinning', 0.25))
 
-    # If no points are given, create DataFrame
+        min_coherence = kwargs.get('min_coherence', 0.8)
+
+        if not isinstance(min_coherence, (int, float)):
+            raise TypeError('Minimum coherence must be of type int or float')
+
+        # Checking that the minimum coherence is between 0 and 1
+        if not 0 <= min_coherence <= 1:
+            raise ValueError('Minimum coherence must be between 0 and 1')
+
+        points = _draw_random_points(extent, random_samples, seed, strategy='weighted', weights=weights)
+        points = points[sample_points(coherence, extent, points) >= min_coherence]
+
+    # If no points are given, draw all random points at once
+    elif points is None:
+        points = _draw_random_points(extent, random_samples, seed,
+                                     **_get_strategy_kwargs(array, extent, kwargs, slope=slope))
+
+    # Converting a single point to a list of points
+    elif len(points) == 2 and isinstance(points[0], (int, float)):
+        points = [points]
+
+    points = np.asarray(points, dtype=float)
+
+    # Getting the interpolation method
+    interpolation = kwargs.get('interpolation', 'nearest')
+
+    # Draw dip, azimuth and z-values for all points at once at the same locations
+    z = sample_points(array, extent, points, interpolation=interpolation)
+    dip = sample_points(slope, extent, points, interpolation=interpolation)
+
+    # Interpolating the azimuth by its vector components to avoid artifacts where the azimuth wraps around 360
+    if interpolation == 'nearest':
+        azimuth = sample_points(aspect, extent, points)
+    else:
+        azimuth = np.rad2deg(np.arctan2(sample_points(np.sin(np.deg2rad(aspect)), extent, points, interpolation),
+                                        sample_points(np.cos(np.deg2rad(aspect)), extent, points, interpolation)))
+        azimuth = azimuth % 360.0
+
+    # Create DataFrame with all relevant columns
+    df = pd.DataFrame({'X': points[:, 0],
+                       'Y': points[:, 1],
+                       'Z': np.asarray(z, dtype=float),
+                       'dip': np.asarray(dip, dtype=float),
+                       'azimuth': np.asarray(azimuth, dtype=float),
+                       'polarity': np.ones(len(points))})
+
+    # Getting formation name
+    formation = kwargs.get('formation', None)
+
+    # Checking if the formation name is of type string
+    if not isinstance(formation, (str, type(None))):
+        raise TypeError('Formation name must be of type string')
+
+    # Assigning formation name
+    if formation is not None:
+        df['formation'] = formation
+
+    return df
+
+
+def _calculate_orientation_weights(array: np.ndarray,
+                                   slope: np.ndarray,
+                                   aspect: np.ndarray,
+                                   window: int = 5,
+                                   thinning: Union[int, float] = 0.25) -> tuple:
+    """Calculating sampling weights for orientations from the slope and the coherence of the aspect, all arrays must
+    have the same orientation. The coherence is the length of the mean aspect vector within a moving window and is 1
+    where all aspects point into the same direction. Cells with a local height variance below the thinning quantile
+    receive a weight of zero
+    Args:
+        array - np.ndarray containing the height values
+        slope - np.ndarray containing the slope of the array
+        aspect - np.ndarray containing the aspect of the array
+        window - int of the size of the moving window
+        thinning - int or float of the quantile of the local height variance below which the weights are set to zero
+    Return:
+        tuple - np.ndarray containing the weights and np.ndarray containing the coherence of the aspect
+    """
+
+    # Checking that the window is of type int
+    if not isinstance(window, int):
+        raise TypeError('Window size must be of type int')
+
+    # Checking that the window is positive
+    if window < 1:
+        raise ValueError('Window size must be larger than 0')
+
+    # Checking that the thinning quantile is of type int or float
+    if not isinstance(thinning, (int, float)):
+        raise TypeError('Thinning quantile must be of type int or float')
+
+    # Checking that the thinning quantile is between 0 and 1
+    if not 0 <= thinning < 1:
+        raise ValueError('Thinning quantile must be between 0 and 1')
+
+    # Calculating the length of the mean aspect vector within the moving window
+    radians = np.deg2rad(np.nan_to_num(aspect.astype(float)))
+    coherence = np.hypot(uniform_filter(np.sin(radians), size=window, mode='nearest'),
+                         uniform_filter(np.cos(radians), size=window, mode='nearest'))
+
+    # Calculating the local height variance from the moving averages of the heights and squared heights
+    heights = np.nan_to_num(array.astype(float))
+    heights = heights - heights.mean()
+    variance = uniform_filter(heights ** 2, size=window, mode='nearest') - \
+        uniform_filter(heights, size=window, mode='nearest') ** 2
+    variance = np.maximum(variance, 0)
+
+    # Weighting cells by slope and coherence and removing cells with a low local height variance, no cells are
+    # removed if the variance is constant
+    weights = np.nan_to_num(slope.astype(float)) * coherence
+    weights[variance < np.quantile(variance, thinning)] = 0
+
+    return weights, coherence
+
+
+# Function tested
+def sample_interfaces(array: Union[np.ndarray, rasterio.io.DatasetReader],
+                      extent: List[Union[int, float]],
+                      random_samples: int = 10, **kwargs) -> pd.DataFrame:
+    """
+    Sampling interfaces from raster
+    Args:
+        array: np.ndarray were points are supposed to be sampled
+        extent: list with the bounds of the array
+        random_samples: int/number or samples to be sampled
+    Kwargs:
+        points: list with coordinates of points
+        seed: int or np.random.Generator for setting a seed
+        formation: str/name of the formation the raster belongs to
+        interpolation: str defining how the values are sampled at the points (nearest, bilinear, bicubic)
+        strategy: str defining how random points are distributed (uniform, stratified, poisson, weighted)
+        weights: np.ndarray with the sampling weights of the raster cells or 'slope' for the weighted strategy
+        radius: int or float of the minimum distance between points for the poisson strategy
+    """
+
+    # Checking if the array is of type np.ndarray or a rasterio object
+    if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
+        raise TypeError('array must be of type np.ndarray')
+
+    # Checking if the extent is of type list
+    if not isinstance(extent, list):
+        raise TypeError('Extent must be of type list')
+
+    # Checking if the number of samples is of type int
+    if not isinstance(random_samples, int):
+        raise TypeError('Number of samples must be of type int')
+
+    # Getting points
+    points = kwargs.get('points', None)
+
+    # Checking if the points are of type list or None
+    if not isinstance(points, (list, type(None))):
+        raise TypeError('Points must be a list of coordinates')
+
+    # Getting seed
+    seed = kwargs.get('seed', 1)
+
+    # Checking if the seed is of type int
+    if not isinstance(seed, (int, np.random.Generator)):
+        raise TypeError('seed must be of type int')
+
+    # Drawing all random points at once if no points are provided
     if points is None:
+        points = _draw_random_points(extent, random_samples, seed, **_get_strategy_kwargs(array, extent, kwargs))
+
+    # Converting a single point to a list of points
+    elif len(points) == 2 and isinstance(points[0], (int, float)):
+        points = [points]
+
+    points = np.asarray(points, dtype=float)
+
+    # Getting the interpolation method
+    interpolation = kwargs.get('interpolation', 'nearest')
+
+    # Drawing Z values for all points at once
+    z = sample_points(array, extent, points, interpolation=interpolation)
+
+    # Creating DataFrame
+    df = pd.DataFrame({'X': points[:, 0], 'Y': points[:, 1], 'Z': np.asarray(z, dtype=float)})
+
+    # Getting formation name
+    formation = kwargs.get('formation', None)
+
+    # Checking if the formation name is of type string
+    if not isinstance(formation, (str, type(None))):
+        raise TypeError('Formation name must be of type string')
+
+    # Assigning formation name
+    if formation is not None:
+        df['formation'] = formation
+
+    return df
+
+
+# Function tested
+def calculate_difference(array1: Union[np.ndarray, rasterio.io.DatasetReader],
+                         array2: Union[np.ndarray, rasterio.io.DatasetReader],
+                         flip_array: bool = True) -> np.ndarray:
+    """
+    Calculate the difference between two rasters
+    Args:
+        array1: np.ndarray 1
+        array2: np.ndarray 2
+        flip_array: bool if array is supposed to be flipped
+    Return:
+        array_diff: np.ndarray with difference between array1 and array2
+    """
+
+    # Checking if array1 is of type np.ndarray or a rasterio object
+    if not isinstance(array1, (np.ndarray, rasterio.io.DatasetReader)):
+        raise TypeError('array1 must be of type np.ndarray or a rasterio object')
+
+    # Checking if array2 is of type np.ndarray or a rasterio object
+    if not isinstance(array2, (np.ndarray, rasterio.io.DatasetReader)):
+        raise TypeError('array2 must be of type np.ndarray or a rasterio object')
+
+    # Checking if array1 is a np.ndarray
+    if not isinstance(array1, np.ndarray):
+        array1 = array1.read(1)
+    # Checking if array2 is a np.ndarray, rasters of a different shape are read directly with the shape of array1
+    if not isinstance(array2, np.ndarray):
+        array2 = array2.read(1) if array2.shape == array1.shape else resize_by_array(array2, array1)
+
+    # Checking if the shape of the arrays are equal and if not rescale array
+    if array1.shape != array2.shape:
+
+        array_rescaled = resize_by_array(array2, array1)
+
+        if flip_array:
+            array_rescaled = np.flipud(array_rescaled)
+
+        # Calculating the difference in floating point as the resized array keeps its possibly unsigned dtype
+        array_diff = np.subtract(array1, array_rescaled, dtype=np.result_type(array1, array_rescaled, np.float32))
+    else:
+        # Flip array if if flip_array is True
+        if flip_array:
+            array2 = np.flipud(array2)
+
+        # Calculate difference between array in floating point
+        array_diff = np.subtract(array1, array2, dtype=np.result_type(array1, array2, np.float32))
+
+    return array_diff
+
+
+# Function tested
+def calculate_difference_tiled(raster1: rasterio.io.DatasetReader,
+                               raster2: rasterio.io.DatasetReader,
+                               path: str,
+                               tile_size: int = 512,
+                               **kwargs):
+    """Calculate the difference between two rasters tile by tile and write it to a GeoTIFF. If the rasters are not on
+    the same grid, the difference is calculated for the overlap of both rasters on the grid of raster1. raster2 is
+    reprojected and resampled onto this grid on the fly for each tile
+    Args:
+        raster1: rasterio object 1
+        raster2: rasterio object 2
+        path: str with the path where the GeoTIFF containing the difference will be saved
+        tile_size: int of the number of rows and columns of each tile
+    Kwargs:
+        dtype: str or np.dtype of the output GeoTIFF, default is 'float32'
+        workers: int of the number of tiles processed in parallel, default is 1
+        executor: str if the tiles are processed by a 'thread' or a 'process' pool, default is 'thread'
+        resampling: str of the method used to resample raster2 onto the grid of raster1, default is bilinear
+        nodata: int or float of the nodata value of the output GeoTIFF, default is the nodata value of raster1 or
+        NaN for floating point outputs
+    """
+
+    # Checking if raster1 is a rasterio object
+    if not isinstance(raster1, rasterio.io.DatasetReader):
+        raise TypeError('raster1 must be a rasterio object')
+
+    # Checking if raster2 is a rasterio object
+    if not isinstance(raster2, rasterio.io.DatasetReader):
+        raise TypeError('raster2 must be a rasterio object')
+
+    # Checking if path is of type string
+    if not isinstance(path, str):
+        raise TypeError('Path must be of type string')
+
+    # Checking if the tile size is of type int
+    if not isinstance(tile_size, int):
+        raise TypeError('Tile size must be of type int')
+
+    # Checking that the tile size is positive
+    if tile_size < 1:
+        raise ValueError('Tile size must be larger than 0')
+
+    dtype = kwargs.get('dtype', 'float32')
+    resampling = kwargs.get('resampling', 'bilinear')
+
+    # Checking if the resampling method is of type string
+    if not isinstance(resampling, str):
+        raise TypeError('Resampling method must be of type string')
+
+    # Checking if the resampling method is supported by rasterio
+    if resampling not in rasterio.enums.Resampling.__members__:
+        raise ValueError('Resampling method must be one of %s' % ', '.join(rasterio.enums.Resampling.__members__))
+
+    # Using the nodata value of raster1 or NaN for floating point outputs
+    nodata = kwargs.get('nodata', raster1.nodata)
+    if nodata is None and np.issubdtype(np.dtype(dtype), np.floating):
+        nodata = np.nan
+
+    workers, executor = _check_workers(kwargs.get('workers', 1), kwargs.get('executor', 'thread'))
+
+    # Calculating the difference on the full grid if both rasters are on the same grid
+    if raster1.shape == raster2.shape and raster1.transform == raster2.transform and \
+            (raster1.crs == raster2.crs or raster2.crs is None):
+        window = Window(0, 0, raster1.width, raster1.height)
+        vrt = None
+        source2 = raster2
+        nodata2 = raster2.nodata
+
+    else:
+        # Checking that both rasters are georeferenced
+        if raster1.crs is None or raster2.crs is None:
+            raise ValueError('Rasters on different grids must both have a CRS')
+
+        # Creating the window of raster1 overlapping raster2
+        bounds = transform_bounds(raster2.crs, raster1.crs, *raster2.bounds)
+        window = _window_from_bounds(bounds, raster1.transform, raster1.height, raster1.width)
+
+        # Reprojecting and resampling raster2 onto the window of raster1 on the fly, an alpha band marks the cells
+        # outside of integer rasters without nodata value
+        nodata2 = raster2.nodata if raster2.nodata is not None else \
+            (np.nan if np.issubdtype(np.dtype(raster2.dtypes[0]), np.floating) else None)
+        vrt = WarpedVRT(raster2,
+                        crs=raster1.crs,
+                        transform=raster1.window_transform(window),
+                        width=window.width,
+                        height=window.height,
+                        resampling=getattr(rasterio.enums.Resampling, resampling),
+                        nodata=nodata2,
+                        add_alpha=nodata2 is None)
+        source2 = vrt
+
+    meta = {'driver': 'GTiff',
+            'height': window.height,
+            'width': window.width,
+            'count': 1,
+            'dtype': dtype,
+            'crs': raster1.crs,
+            'transform': raster1.window_transform(window),
+            'nodata': nodata}
+
+    if tile_size % 16 == 0:
+        meta.update({'tiled': True, 'blockxsize': tile_size, 'blockysize': tile_size})
+
+    # Reading the tiles of both rasters in the main thread
+    def tiles():
+        for tile in _iterate_windows(window.height, window.width, tile_size):
+            tile1 = raster1.read(1, window=Window(tile.col_off + window.col_off, tile.row_off + window.row_off,
+                                                  tile.width, tile.height))
+            invalid2 = vrt.dataset_mask(window=tile) == 0 if vrt is not None and nodata2 is None else None
+            yield tile, (tile1, source2.read(1, window=tile), dtype, nodata, raster1.nodata, nodata2, invalid2)
+
+    try:
+        with rasterio.open(path, 'w', **meta) as dst:
+            for tile, tile_diff in _map_tiles(_subtract_tiles, tiles(), workers, executor):
+                dst.write(tile_diff, 1, window=tile)
+    finally:
+        if vrt is not None:
+            vrt.close()
+
+
+def _subtract_tiles(tile1: np.ndarray,
+                    tile2: np.ndarray,
+                    dtype,
+                    nodata: Union[int, float] = None,
+                    nodata1: Union[int, float] = None,
+                    nodata2: Union[int, float] = None,
+                    invalid2: np.ndarray = None) -> np.ndarray:
+    """Calculate the difference between two tiles
+    Args:
+        tile1: np.ndarray 1
+        tile2: np.ndarray 2
+        dtype: dtype of the returned array
+        nodata: int or float assigned to cells where one of the tiles contains nodata
+        nodata1: int or float of the nodata value of tile1
+        nodata2: int or float of the nodata value of tile2
+        invalid2: np.ndarray of type bool which is True for cells of tile2 without data
+    Return:
+        tile_diff: np.ndarray with difference between tile1 and tile2
+    """
+
+    # Subtracting in floating point to avoid the wraparound of unsigned integers
+    tile_diff = np.subtract(tile1, tile2, dtype=np.result_type(tile1, tile2, np.float32)).astype(dtype, copy=False)
+
+    # Assigning the nodata value to cells without data in one of the tiles
+    if nodata is not None:
+        invalid = _nodata_mask(tile1, nodata1) | _nodata_mask(tile2, nodata2)
+        if invalid2 is not None:
+            invalid |= invalid2
+        if invalid.any():
+            tile_diff[invalid] = nodata
+
+    return tile_diff
+
+
+def _nodata_mask(tile: np.ndarray, nodata: Union[int, float] = None) -> np.ndarray:
+    """Getting the cells of a tile containing the nodata value or NaN
+    Args:
+        tile: np.ndarray of the tile
+        nodata: int or float of the nodata value of the tile
+    Return:
+        mask: np.ndarray of type bool which is True for cells without data
+    """
+
+    mask = np.isnan(tile) if np.issubdtype(tile.dtype, np.floating) else np.zeros(tile.shape, dtype=bool)
+
+    if nodata is not None and not np.isnan(nodata):
+        mask |= tile == nodata
+
+    return mask
 
-        # Setting the seed
-        if seed is not None:
-            np.random.seed(seed)
-
-        # Draw dip, azimuth and z-values randomly
-        dip = [sample_randomly(slope, extent) for i in range(random_samples)]
-        azimuth = [sample_randomly(aspect, extent) for i in range(random_samples)]
-        z = [sample_randomly(array, extent) for i in range(random_samples)]
-
-        # Create DataFrame with all relevant columns, XY locations are obtained from drawing z values
-        df = pd.DataFrame(data=[[z[i][1][0] for i in range(len(z))],
-                                [z[i][1][1] for i in range(len(z))],
-                                [z[i][0] for i in range(len(z))],
-                                [dip[i][0] for i in range(len(dip))],
-                                [azimuth[i][0] for i in range(len(azimuth))],
-                                [1] * random_samples],
-                          index=['X', 'Y', 'Z', 'dip', 'azimuth', 'polarity']).transpose()
-
-    # Create DataFrames if points are provided
-    else:
-        if len(points) == 2:
-            if isinstance(points[0], int):
 
-                # Draw dip, azimuth and z-values
-                dip = sample(slope, extent, points)
-                azimuth = sample(aspect, extent, points)
-                z = sample(array, extent, points)
+# Function tested
+def resample(array: Union[np.ndarray, rasterio.io.DatasetReader],
+             shape: Union[tuple, list],
+             method: str = 'bilinear',
+             **kwargs) -> np.ndarray:
+    """Resampling a raster to a new shape while keeping its dtype. Arrays are resampled in chunks of output rows so
+    that only the source rows of one chunk are converted to floating point at a time. Rasterio objects are read
+    directly with the new shape so that GDAL can use the overviews of the file
+    Args:
+        array: np.ndarray or rasterio object to be resampled
+        shape: tuple or list of the number of rows and columns of the resampled raster
+        method: str of the resampling method (nearest, bilinear, average, mode), default is bilinear
+    Kwargs:
+        chunk_size: int of the number of output rows resampled at once, default is 256
+        out: np.ndarray or np.memmap of the new shape the resampled raster is written to
+        window: rasterio.windows.Window of the rasterio object to be resampled
+    Return:
+        array_resampled: np.ndarray with the new shape and the dtype of the input raster
+    """
 
-                # Create DataFrames
-                df = pd.DataFrame(data=[points[0], points[1], z, dip, azimuth, 1],
-                                  index=['X', 'Y', 'Z', 'dip', 'azimuth', 'polarity']).transpose()
+    # Checking if the array is of type np.ndarray or a rasterio object
+    if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
+        raise TypeError('Array must be of type np.ndarray or a rasterio object')
 
-            elif isinstance(points[0], float):
+    # Checking if the shape is of type tuple or list
+    if not isinstance(shape, (tuple, list)):
+        raise TypeError('Shape must be of type tuple or list')
 
-                # Draw dip, azimuth and z-values
-                dip = sample(slope, extent, points)
-                azimuth = sample(aspect, extent, points)
-                z = sample(array, extent, points)
+    # Checking that the shape contains two positive integers
+    if len(shape) != 2 or not all(isinstance(n, (int, np.integer)) and n > 0 for n in shape):
+        raise ValueError('Shape must contain two positive integers')
 
-                # Create DataFrames
-                df = pd.DataFrame(data=[points[0], points[1], z, dip, azimuth, 1],
-                                  index=['X', 'Y', 'Z', 'dip', 'azimuth', 'polarity']).transpose()
+    # Checking if the method is of type string
+    if not isinstance(method, str):
+        raise TypeError('Resampling method must be of type string')
 
-            else:
+    # Checking if the method is supported
+    if method not in ['nearest', 'bilinear', 'average', 'mode']:
+        raise ValueError('Resampling method must be one of nearest, bilinear, average or mode')
 
-                # Draw dip, azimuth and z-values
-                z = [sample(array, extent, points[i]) for i, point in enumerate(points)]
-                dip = [sample(slope, extent, points[i]) for i, point in enumerate(points)]
-                azimuth = [sample(aspect, extent, points[i]) for i, point in enumerate(points)]
+    shape = (int(shape[0]), int(shape[1]))
+    chunk_size = kwargs.get('chunk_size', 256)
+    out = kwargs.get('out', None)
 
-                # Create DataFrames
-                df = pd.DataFrame(
-                    data=[[points[i][0] for i in range(len(points))], [points[i][1] for i in range(len(points))], z,
-                          dip, azimuth, [1, 1]], index=['X', 'Y', 'Z', 'dip', 'azimuth', 'polarity']).transpose()
+    # Checking if the chunk size is of type int
+    if not isinstance(chunk_size, int):
+        raise TypeError('Chunk size must be of type int')
 
-        else:
-            # Draw dip, azimuth and z-values
-            z = [sample(array, extent, points[i]) for i, point in enumerate(points)]
-            dip = [sample(slope, extent, points[i]) for i, point in enumerate(points)]
-            azimuth = [sample(aspect, extent, points[i]) for i, point in enumerate(points)]
+    # Checking that the chunk size is positive
+    if chunk_size < 1:
+        raise ValueError('Chunk size must be larger than 0')
 
-            # Create DataFrames
-            df = pd.DataFrame(
-                data=[[points[i][0] for i in range(len(points))], [points[i][1] for i in range(len(points))], z, dip,
-                      azimuth, [1] * len(points)], index=['X', 'Y', 'Z', 'dip', 'azimuth', 'polarity']).transpose()
+    # Checking that the output array is of type np.ndarray and has the new shape
+    if out is not None and (not isinstance(out, np.ndarray) or out.shape != shape):
+        raise ValueError('Output array must be of type np.ndarray with the new shape')
 
-    # Getting formation name
-    formation = kwargs.get('formation', None)
+    # Reading the raster with the new shape, GDAL uses overviews if available
+    if isinstance(array, rasterio.io.DatasetReader):
+        resampling = getattr(rasterio.enums.Resampling, method)
+        if out is not None:
+            return array.read(1, out=out, window=kwargs.get('window', None), resampling=resampling)
+        return array.read(1, out_shape=shape, window=kwargs.get('window', None), resampling=resampling)
+
+    # Checking that the array is two dimensional
+    if array.ndim != 2:
+        raise ValueError('Array must be a 2D array')
+
+    if out is None:
+        out = np.empty(shape, dtype=array.dtype)
+
+    # Returning a copy if the shape does not change
+    if array.shape == shape:
+        out[:] = array
+        return out
+
+    if method == 'nearest':
+        function = _resample_nearest
+    elif method == 'bilinear':
+        function = _resample_bilinear
+    elif method == 'average':
+        function = _resample_average
+    else:
+        function = _resample_mode
 
-    # Checking if the formation name is of type string
-    if not isinstance(formation, (str, type(None))):
-        raise TypeError('Formation name must be of type string')
+    function = function(array, shape)
 
-    # Assigning formation name
-    if formation is not None:
-        df['formation'] = formation
+    for start in range(0, shape[0], chunk_size):
+        stop = min(start + chunk_size, shape[0])
+        out[start:stop] = function(start, stop)
 
-    return df
+    return out
 
 
-# Function tested
-def sample_interfaces(array: Union[np.ndarray, rasterio.io.DatasetReader],
-                      extent: List[Union[int, float]],
-                      random_samples: int = 10, **kwargs) -> pd.DataFrame:
-    """
-    Sampling interfaces from raster
+def _resample_nearest(array: np.ndarray, shape: tuple):
+    """Creating a function returning the rows start to stop of an array resampled with nearest neighbours
     Args:
-        array: np.ndarray were points are supposed to be sampled
-        extent: list with the bounds of the array
-        random_samples: int/number or samples to be sampled
-    Kwargs:
-        points: list with coordinates of points
-        seed: int for setting a seed
-        formation: str/name of the formation the raster belongs to
+        array: np.ndarray to be resampled
+        shape: tuple of the number of rows and columns of the resampled array
+    Return:
+        function: callable taking the first and last output row and returning the resampled rows
     """
 
-    # Checking if the array is of type np.ndarray or a rasterio object
-    if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
-        raise TypeError('array must be of type np.ndarray')
+    rows = _nearest_indices(array.shape[0], shape[0])
+    cols = _nearest_indices(array.shape[1], shape[1])
 
-    # Checking if the extent is of type list
-    if not isinstance(extent, list):
-        raise TypeError('Extent must be of type list')
+    def function(start, stop):
+        return array[rows[start:stop, np.newaxis], cols]
 
-    # Checking if the number of samples is of type int
-    if not isinstance(random_samples, int):
-        raise TypeError('Number of samples must be of type int')
+    return function
 
-    # Getting points
-    points = kwargs.get('points', None)
 
-    # Checking if the points are of type list or None
-    if not isinstance(points, (list, type(None))):
-        raise TypeError('Points must be a list of coordinates')
+def _nearest_indices(size: int, new_size: int) -> np.ndarray:
+    """Getting the indices of the source cells whose centers are closest to the centers of the resampled cells
+    Args:
+        size: int of the number of source cells
+        new_size: int of the number of resampled cells
+    Return:
+        indices: np.ndarray containing the index of the source cell of each resampled cell
+    """
 
-    # Getting seed
-    seed = kwargs.get('seed', 1)
+    indices = np.minimum(((np.arange(new_size) + 0.5) * size / new_size).astype(np.int64), size - 1)
 
-    # Checking if the seed is of type int
-    if not isinstance(seed, int):
-        raise TypeError('seed must be of type int')
+    return indices
 
-    # Create DataFrame if no points are provided
-    if points is None:
 
-        # Setting seed
-        if seed is not None:
-            np.random.seed(seed)
+def _resample_bilinear(array: np.ndarray, shape: tuple):
+    """Creating a function returning the rows start to stop of an array resampled with bilinear interpolation
+    between the cell centers without anti-aliasing
+    Args:
+        array: np.ndarray to be resampled
+        shape: tuple of the number of rows and columns of the resampled array
+    Return:
+        function: callable taking the first and last output row and returning the resampled rows
+    """
 
-        # Drawing Z values
-        z = [sample_randomly(array, extent) for i in range(random_samples)]
+    dtype = np.result_type(array.dtype, np.float32)
 
-        # Creating DataFrame
-        df = pd.DataFrame(data=[[z[i][1][0] for i in range(len(z))],
-                                [z[i][1][1] for i in range(len(z))],
-                                [z[i][0] for i in range(len(z))]],
-                          index=['X', 'Y', 'Z']).transpose()
+    def coordinates(size, new_size):
+        coords = np.clip((np.arange(new_size) + 0.5) * size / new_size - 0.5, 0, size - 1)
+        lower = np.floor(coords).astype(np.int64)
+        upper = np.minimum(lower + 1, size - 1)
+        return lower, upper, (coords - lower).astype(dtype)
 
-    else:
-        if len(points) == 2:
-            if isinstance(points[0], int):
+    row0, row1, row_weights = coordinates(array.shape[0], shape[0])
+    col0, col1, col_weights = coordinates(array.shape[1], shape[1])
 
-                # Drawing Z values
-                z = sample(array, extent, points)
+    def function(start, stop):
+        top = array[row0[start:stop]].astype(dtype)
+        rows = top + (array[row1[start:stop]] - top) * row_weights[start:stop, np.newaxis]
+        left = rows[:, col0]
+        chunk = left + (rows[:, col1] - left) * col_weights
+        return _cast_resampled(chunk, array.dtype)
 
-                # Creating DataFrame
-                df = pd.DataFrame(data=[points[0], points[1], z], index=['X', 'Y', 'Z']).transpose()
+    return function
 
-            elif isinstance(points[0], float):
 
-                # Drawing Z values
-                z = sample(array, extent, points)
+def _resample_average(array: np.ndarray, shape: tuple):
+    """Creating a function returning the rows start to stop of an array resampled with the area weighted average of
+    all source cells overlapping each resampled cell
+    Args:
+        array: np.ndarray to be resampled
+        shape: tuple of the number of rows and columns of the resampled array
+    Return:
+        function: callable taking the first and last output row and returning the resampled rows
+    """
 
-                # Creating DataFrame
-                df = pd.DataFrame(data=[points[0], points[1], z], index=['X', 'Y', 'Z']).transpose()
+    dtype = np.result_type(array.dtype, np.float32)
 
-            else:
+    row_weights = _average_weights(array.shape[0], shape[0], dtype)
+    col_weights = _average_weights(array.shape[1], shape[1], dtype).T.tocsc()
 
-                # Drawing Z values
-                z = [sample(array, extent, points[i]) for i, point in enumerate(points)]
+    def function(start, stop):
+        weights = row_weights[start:stop]
+        first = weights.indices.min()
+        last = weights.indices.max() + 1
+        rows = weights[:, first:last] @ array[first:last].astype(dtype)
+        chunk = rows @ col_weights
+        return _cast_resampled(chunk, array.dtype)
 
-                # Creating DataFrame
-                df = pd.DataFrame(
-                    data=[[points[i][0] for i in range(len(points))], [points[i][1] for i in range(len(points))], z],
-                    index=['X', 'Y', 'Z']).transpose()
+    return function
 
-        else:
 
-            # Drawing Z values
-            z = [sample(array, extent, points[i]) for i, point in enumerate(points)]
+def _average_weights(size: int, new_size: int, dtype) -> sparse.csr_matrix:
+    """Calculating the fractions of the source cells covered by each resampled cell
+    Args:
+        size: int of the number of source cells
+        new_size: int of the number of resampled cells
+        dtype: dtype of the weights
+    Return:
+        weights: sparse matrix of shape (new_size, size) with rows summing up to one
+    """
 
-            # Creating DataFrame
-            df = pd.DataFrame(
-                data=[[points[i][0] for i in range(len(points))], [points[i][1] for i in range(len(points))], z],
-                index=['X', 'Y', 'Z']).transpose()
+    scale = size / new_size
+    start = np.arange(new_size) * scale
+    stop = start + scale
 
-    # Getting formation name
-    formation = kwargs.get('formation', None)
+    # Getting all source cells overlapping each resampled cell
+    first = np.floor(start).astype(np.int64)
+    last = np.minimum(np.ceil(stop).astype(np.int64), size)
+    counts = last - first
+    rows = np.repeat(np.arange(new_size), counts)
+    cols = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
 
-    # Checking if the formation name is of type string
-    if not isinstance(formation, (str, type(None))):
-        raise TypeError('Formation name must be of type string')
+    # Calculating the overlap of the cells
+    overlap = np.minimum(cols + 1, stop[rows]) - np.maximum(cols, start[rows])
+    rows = rows[overlap > 0]
+    cols = cols[overlap > 0]
+    overlap = overlap[overlap > 0]
 
-    # Assigning formation name
-    if formation is not None:
-        df['formation'] = formation
+    weights = sparse.csr_matrix((overlap / np.bincount(rows, weights=overlap, minlength=new_size)[rows], (rows, cols)),
+                                shape=(new_size, size), dtype=dtype)
 
-    return df
+    return weights
 
 
-# Function tested
-def calculate_difference(array1: Union[np.ndarray, rasterio.io.DatasetReader],
-                         array2: Union[np.ndarray, rasterio.io.DatasetReader],
-                         flip_array: bool = True) -> np.ndarray:
-    """
-    Calculate the difference between two rasters
+def _resample_mode(array: np.ndarray, shape: tuple):
+    """Creating a function returning the rows start to stop of an array resampled with the most frequent value of
+    the source cells whose centers fall into each resampled cell. Resampled cells without source cell centers take
+    the value of the nearest source cell
     Args:
-        array1: np.ndarray 1
-        array2: np.ndarray 2
-        flip_array: bool if array is supposed to be flipped
+        array: np.ndarray to be resampled
+        shape: tuple of the number of rows and columns of the resampled array
     Return:
-        array_diff: np.ndarray with difference between array1 and array2
+        function: callable taking the first and last output row and returning the resampled rows
     """
 
-    # Checking if array1 is of type np.ndarray or a rasterio object
-    if not isinstance(array1, (np.ndarray, rasterio.io.DatasetReader)):
-        raise TypeError('array1 must be of type np.ndarray or a rasterio object')
+    nearest = _resample_nearest(array, shape)
 
-    # Checking if array2 is of type np.ndarray or a rasterio object
-    if not isinstance(array2, (np.ndarray, rasterio.io.DatasetReader)):
-        raise TypeError('array2 must be of type np.ndarray or a rasterio object')
+    # Getting the resampled cell of each source cell
+    rows = np.minimum(((np.arange(array.shape[0]) + 0.5) * shape[0] / array.shape[0]).astype(np.int64), shape[0] - 1)
+    cols = np.minimum(((np.arange(array.shape[1]) + 0.5) * shape[1] / array.shape[1]).astype(np.int64), shape[1] - 1)
 
-    # Checking if array1 is a np.ndarray
-    if not isinstance(array1, np.ndarray):
-        array1 = array1.read(1)
-    # Checking if array2 is a np.ndarray
-    if not isinstance(array2, np.ndarray):
-        array2 = array2.read(1)
+    def function(start, stop):
+        chunk = nearest(start, stop)
 
-    # Checking if the shape of the arrays are equal and if not rescale array
-    if array1.shape != array2.shape:
+        first, last = np.searchsorted(rows, [start, stop])
+        if first == last:
+            return chunk
 
-        array_rescaled = resize_by_array(array2, array1)
+        # Counting the occurrences of each value in each resampled cell
+        cells = ((rows[first:last, np.newaxis] - start) * shape[1] + cols).ravel()
+        values, codes = np.unique(array[first:last].ravel(), return_inverse=True)
+        keys, counts = np.unique(cells * len(values) + codes.ravel(), return_counts=True)
+        cells, codes = np.divmod(keys, len(values))
 
-        if flip_array:
-            array_rescaled = np.flipud(array_rescaled)
+        # Selecting the most frequent and for ties the smallest value of each cell
+        order = np.lexsort((codes, -counts, cells))
+        order = order[np.r_[True, cells[order][1:] != cells[order][:-1]]]
+        chunk.ravel()[cells[order]] = values[codes[order]]
 
-        array_diff = array1 - array_rescaled
-    else:
-        # Flip array if if flip_array is True
-        if flip_array:
-            array2 = np.flipud(array2)
+        return chunk
 
-        # Calculate difference between array
-        array_diff = array1 - array2
+    return function
 
-    return array_diff
+
+def _cast_resampled(chunk: np.ndarray, dtype) -> np.ndarray:
+    """Casting resampled values back to the dtype of the source array, integers are rounded
+    Args:
+        chunk: np.ndarray containing the resampled floating point values
+        dtype: dtype of the source array
+    Return:
+        chunk: np.ndarray of the provided dtype
+    """
+
+    if np.issubdtype(dtype, np.integer) or dtype == bool:
+        chunk = np.rint(chunk)
+
+    return chunk.astype(dtype, copy=False)
 
 
 # Function tested
-def resize_by_array(array1: np.ndarray, array2: np.ndarray) -> np.ndarray:
+def resize_by_array(array1: np.ndarray, array2: np.ndarray, method: str = 'bilinear') -> np.ndarray:
     """
     Rescaling raster to the size of another raster
     Args:
         array1: np.ndarray to be converted to correct size
         array2: np.ndarray of correct size
+        method: str of the resampling method (nearest, bilinear, average, mode), default is bilinear
     Return:
-        array_resize: np.ndarray rescaled to the shape of array1
+        array_resize: np.ndarray rescaled to the shape of array2
     """
 
-    # Converting rasterio object to array
-    if isinstance(array1, rasterio.io.DatasetReader):
-        array1 = array1.read(1)
-
-    # Converting rasterio object to array
-    if isinstance(array2, rasterio.io.DatasetReader):
-        array2 = array2.read(1)
-
-    # Checking if array1 is of type np.ndarray
-    if not isinstance(array1, np.ndarray):
+    # Checking if array1 is of type np.ndarray or a rasterio object
+    if not isinstance(array1, (np.ndarray, rasterio.io.DatasetReader)):
         raise TypeError('array1 must be of type np.ndarray')
 
-    # Checking if array2 is of type np.ndarray
-    if not isinstance(array2, np.ndarray):
+    # Checking if array2 is of type np.ndarray or a rasterio object
+    if not isinstance(array2, (np.ndarray, rasterio.io.DatasetReader)):
         raise TypeError('array2 must be of type np.ndarray')
 
-    # Set size
-    extent = [0,array2.shape[1],0,array2.shape[0]]
+    # Set size, only the shape of array2 is needed
+    extent = [0, array2.shape[1], 0, array2.shape[0]]
 
     # Resize array
-    array_resized = resize_raster(array1, extent)
+    array_resized = resize_raster(array1, extent, method=method)
 
     return array_resized
 
 
 # Function tested
-def resize_raster(array: np.ndarray, extent: List[Union[int,float]]) -> np.ndarray:
+def resize_raster(array: np.ndarray, extent: List[Union[int,float]], method: str = 'bilinear') -> np.ndarray:
     """
         Resize raster to given dimensions
         Args:
             array: np.ndarray to be converted
             extent: list of values of new dimensions
+            method: str of the resampling method (nearest, bilinear, average, mode), default is bilinear
         Return:
             array_resize: np.ndarray rescaled to the shape the provided dimensions
         """
 
-    # Converting rasterio object to array
-    if isinstance(array, rasterio.io.DatasetReader):
-        array = array.read(1)
-
-    # Checking if array1 is of type np.ndarray
-    if not isinstance(array, np.ndarray):
+    # Checking if array1 is of type np.ndarray or a rasterio object
+    if not isinstance(array, (np.ndarray, rasterio.io.DatasetReader)):
         raise TypeError('array1 must be of type np.ndarray')
 
     # Checking if dimensions if of type list
     if not isinstance(extent, list):
         raise TypeError('Dimensions must be of type list')
 
-    size = (extent[3]-extent[2],extent[1]-extent[0])
-    array_resized = resize(array, size)
+    size = (int(round(extent[3]-extent[2])), int(round(extent[1]-extent[0])))
+    array_resized = resample(array, size, method=method)
 
     return array_resized
 
@@ -669,23 +2015,35 @@ def resize_raster(array: np.ndarray, extent: List[Union[int,float]]) -> np.ndarr
 def save_as_tiff(path: str,
                  array: np.ndarray,
                  extent: List[Union[int, float]],
-                 crs: str, nodata=None):
+                 crs: str, nodata=None,
+                 **kwargs):
     """
     Saving a np array as tif file
     Kwargs:
         path: string with the name and path of the file
-        array: np.ndarray containing the raster values
+        array: np.ndarray containing the raster values, either of shape (rows, columns) or (bands, rows, columns), or
+               a generator yielding tuples of the index of the first row and the values of consecutive chunks of rows
         extent: list containing the bounds of the raster
         crs: string containing the CRS of the raster
         nodata: nodata of the raster
+        shape: tuple of the shape of the raster, must be provided if array is a generator
+        dtype: str or np.dtype of the raster, must be provided if array is a generator
+        tiled: bool whether the raster is stored in internal tiles, default is False
+        blocksize: int of the size of the internal tiles, must be a multiple of 16, default is 256
+        compress: str of the compression (deflate, zstd, lerc, lzw), default is None
+        predictor: int of the predictor used for compression (1 none, 2 horizontal, 3 floating point)
+        overviews: list of int of the decimation factors of the overviews to be built, default is None, Cloud
+                   Optimized GeoTIFFs always contain overviews
+        overview_resampling: str of the resampling method of the overviews, default is 'average'
+        cog: bool whether the raster is saved as Cloud Optimized GeoTIFF, default is False
     """
 
     # Checking if path is of type string
     if not isinstance(path, str):
         raise TypeError('Path must be of type string')
 
-    # Checking if the array is of type np.ndarray
-    if not isinstance(array, np.ndarray):
+    # Checking if the array is of type np.ndarray or a generator
+    if not isinstance(array, (np.ndarray, types.GeneratorType)):
         raise TypeError('array must be of type np.ndarray')
 
     # Checking if the extent is of type list
@@ -700,26 +2058,121 @@ def save_as_tiff(path: str,
     if not isinstance(crs, (str, dict)):
         raise TypeError('CRS must be of type string or dict')
 
+    # Getting the shape and dtype of the raster
+    if isinstance(array, np.ndarray):
+        shape = array.shape
+        dtype = array.dtype
+    else:
+        shape = kwargs.get('shape', None)
+        dtype = kwargs.get('dtype', None)
+
+        # Checking if shape and dtype are provided for generators
+        if shape is None or dtype is None:
+            raise ValueError('Shape and dtype must be provided if the array is a generator')
+
+    # Checking if the raster has two or three dimensions
+    if len(shape) not in [2, 3]:
+        raise ValueError('array must be of shape (rows, columns) or (bands, rows, columns)')
+
+    tiled = kwargs.get('tiled', False)
+    blocksize = kwargs.get('blocksize', 256)
+    compress = kwargs.get('compress', None)
+    predictor = kwargs.get('predictor', None)
+    overviews = kwargs.get('overviews', None)
+    overview_resampling = kwargs.get('overview_resampling', 'average')
+    cog = kwargs.get('cog', False)
+
+    # Checking if tiled and cog are of type bool
+    if not isinstance(tiled, bool) or not isinstance(cog, bool):
+        raise TypeError('tiled and cog must be of type bool')
+
+    # Checking if the blocksize is a multiple of 16
+    if not isinstance(blocksize, int) or blocksize < 16 or blocksize % 16 != 0:
+        raise ValueError('Blocksize must be a multiple of 16')
+
+    # Checking if the compression is supported
+    if compress not in [None, 'deflate', 'zstd', 'lerc', 'lzw']:
+        raise ValueError('Compression must be one of deflate, zstd, lerc or lzw')
+
+    # Checking if the predictor is supported
+    if predictor not in [None, 1, 2, 3]:
+        raise ValueError('Predictor must be 1, 2 or 3')
+
+    # Checking if the overviews are provided as list of ints
+    if overviews is not None and not (isinstance(overviews, list) and all(isinstance(n, int) for n in overviews)):
+        raise TypeError('Overviews must be provided as list of int')
+
+    # Checking if the overview resampling method is supported by rasterio
+    if overview_resampling not in rasterio.enums.Resampling.__members__:
+        raise ValueError('Overview resampling method must be one of %s'
+                         % ', '.join(rasterio.enums.Resampling.__members__))
+
     # Extracting the bounds
     minx, miny, maxx, maxy = extent[0], extent[2], extent[1], extent[3]
 
     # Creating the transform
-    transform = rasterio.transform.from_bounds(minx, miny, maxx, maxy, array.shape[1], array.shape[0])
-
-    # Creating and saving the array as tiff
-    with rasterio.open(
-            path,
-            'w',
-            driver='GTiff',
-            height=array.shape[0],
-            width=array.shape[1],
-            count=1,
-            dtype=array.dtype,
-            crs=crs,
-            transform=transform,
-            nodata=nodata
-    ) as dst:
-        dst.write(np.flipud(array), 1)
+    transform = rasterio.transform.from_bounds(minx, miny, maxx, maxy, shape[-1], shape[-2])
+
+    # Creating the creation options
+    profile = {'driver': 'GTiff',
+               'height': shape[-2],
+               'width': shape[-1],
+               'count': 1 if len(shape) == 2 else shape[0],
+               'dtype': dtype,
+               'crs': crs,
+               'transform': transform,
+               'nodata': nodata}
+
+    if tiled or cog:
+        profile.update({'tiled': True, 'blockxsize': blocksize, 'blockysize': blocksize})
+    if compress is not None:
+        profile['compress'] = compress
+    if predictor is not None:
+        profile['predictor'] = predictor
+
+    # Writing a temporary GeoTIFF next to the output that is copied to a Cloud Optimized GeoTIFF afterwards
+    if cog:
+        handle, path_tiff = tempfile.mkstemp(suffix='.tif', dir=os.path.dirname(os.path.abspath(path)))
+        os.close(handle)
+    else:
+        path_tiff = path
+
+    # Creating the chunks of rows if an array is provided, the chunks are flipped instead of the full array
+    if isinstance(array, np.ndarray):
+        chunk_size = blocksize if tiled or cog else 256
+        chunks = ((start, array[..., start:start + chunk_size, :]) for start in range(0, shape[-2], chunk_size))
+    else:
+        chunks = array
+
+    try:
+        # Creating and saving the array as tiff
+        with rasterio.open(path_tiff, 'w', **profile) as dst:
+            for start, chunk in chunks:
+                rows = chunk.shape[-2]
+                window = Window(0, shape[-2] - start - rows, shape[-1], rows)
+                if len(shape) == 2:
+                    dst.write(np.flipud(chunk), 1, window=window)
+                else:
+                    dst.write(np.flip(chunk, axis=1), window=window)
+
+            # Building the overviews
+            if overviews and not cog:
+                dst.build_overviews(overviews, getattr(rasterio.enums.Resampling, overview_resampling))
+                dst.update_tags(ns='rio_overview', resampling=overview_resampling)
+
+        # Copying the GeoTIFF to a Cloud Optimized GeoTIFF including overviews
+        if cog:
+            options = {'blocksize': blocksize, 'overview_resampling': overview_resampling}
+            if compress is not None:
+                options['compress'] = compress
+            if predictor is not None:
+                options['predictor'] = predictor
+            rasterio.shutil.copy(path_tiff, path, driver='COG', **options)
+
+    finally:
+        # Removing the temporary GeoTIFF also if writing failed
+        if cog and os.path.exists(path_tiff):
+            os.remove(path_tiff)
 
 
 # Function tested
@@ -727,7 +2180,7 @@ def clip_by_extent(raster: Union[rasterio.io.DatasetReader, np.ndarray],
                    bbox: Union[List[Union[int, float]], type(None)] = None,
                    bbox_shapely: shapely.geometry.polygon.Polygon = None,
                    bbox_crs: Union[type(None), str] = None,
-                   save: bool = True,
+                   save: bool = None,
                    path: str = 'clipped.tif',
                    **kwargs) -> np.ndarray:
     """
@@ -737,13 +2190,20 @@ def clip_by_extent(raster: Union[rasterio.io.DatasetReader, np.ndarray],
         bbox: list of bounds (extent) of the clipped area (minx,maxx, miny, maxy)
         bbox_shapely: shapely polygon containing the coordinates for the bounding box
         bbox_crs: str containing the crs of the bounding box
-        save: bool whether to save the clipped raster or not
+        save: bool whether to save the clipped raster or not, default is True but False in windowed mode so that
+              the clipped raster is only saved if requested explicitly
         path: str with the path where the rasterio object will be saved
     Kwargs:
         extent_raster: list of the extent of the raster (only for np.ndarray), if no extent is provided, the origin
                         of the array will be set to 0,0
+        windowed: bool whether only the window of the raster containing the extent is read without masking, for
+                        np.ndarrays a view of the array is returned, the first row of the array corresponds to the
+                        minimum y value as for save_as_tiff
+        crs: str or dict containing the CRS used to save a clipped np.ndarray, default is 'EPSG:4326' but it must
+                        be provided explicitly in windowed mode
     Return:
-        np.ndarray of the clipped area
+        np.ndarray of the clipped area, if windowed is True a tuple of the np.ndarray, the extent of the clipped
+        area and its transform is returned
     """
 
     # Checking that the raster is of type np.ndarray or a rasterio object
@@ -763,13 +2223,24 @@ def clip_by_extent(raster: Union[rasterio.io.DatasetReader, np.ndarray],
         raise TypeError('Bounds values must be of type int or float')
 
     # Checking if argument save if of type bool
-    if not isinstance(save, bool):
+    if not isinstance(save, (bool, type(None))):
         raise TypeError('Saving option must be of type bool')
 
     # Checking if path is of type string
     if not isinstance(path, str):
         raise TypeError('Path must be of type string')
 
+    # Getting the windowed reading option
+    windowed = kwargs.get('windowed', False)
+
+    # Checking if windowed is of type bool
+    if not isinstance(windowed, bool):
+        raise TypeError('Windowed option must be of type bool')
+
+    # Saving the clipped raster by default only if it is not clipped in windowed mode
+    if save is None:
+        save = not windowed
+
     # Checking if raster is rasterio object
     if isinstance(raster, rasterio.io.DatasetReader):
 
@@ -784,6 +2255,10 @@ def clip_by_extent(raster: Union[rasterio.io.DatasetReader, np.ndarray],
         if bbox_crs is None:
             bbox_crs = raster.crs
 
+        # Reading only the window containing the bbox
+        if windowed:
+            return _clip_by_window(raster, bbox_shapely, bbox_crs, save, path)
+
         # Obtaining coordinates to clip the raster, extent coordinates will automatically be converted if
         # raster_crs!=bbox_crs
         coords = getFeatures(bbox, raster.crs, bbox_crs, bbox=bbox_shapely)
@@ -815,6 +2290,10 @@ def clip_by_extent(raster: Union[rasterio.io.DatasetReader, np.ndarray],
         # Get the extent of the raster
         extent_raster = kwargs.get('extent_raster', [0, raster.shape[1], 0, raster.shape[0]])
 
+        # Returning a view of the array without saving it unless requested
+        if windowed:
+            return _clip_array_by_window(raster, extent_raster, bbox, save, path, kwargs.get('crs', None))
+
         # Create column and row indices for clipping
         column1 = int((bbox[0] - extent_raster[0]) / (extent_raster[1] - extent_raster[0]) * raster.shape[1])
         row1 = int((bbox[1] - extent_raster[2]) / (extent_raster[3] - extent_raster[2]) * raster.shape[0])
@@ -825,11 +2304,149 @@ def clip_by_extent(raster: Union[rasterio.io.DatasetReader, np.ndarray],
         clipped_array = raster[column1:row1, column2:row2]
 
         if save:
-            save_as_tiff(path, clipped_array, bbox, 'EPSG:4326')
+            save_as_tiff(path, clipped_array, bbox, kwargs.get('crs', 'EPSG:4326'))
 
     return clipped_array
 
 
+def _clip_array_by_window(array: np.ndarray,
+                          extent: List[Union[int, float]],
+                          bbox: List[Union[int, float]],
+                          save: bool = False,
+                          path: str = 'clipped.tif',
+                          crs: Union[str, dict] = None) -> tuple:
+    """
+    Clipping a np.ndarray by returning a view of all cells intersecting a bounding box
+    Args:
+        array: np.ndarray to be clipped, the first row corresponds to the minimum y value
+        extent: list of the extent of the array (minx, maxx, miny, maxy)
+        bbox: list of bounds (extent) of the clipped area (minx, maxx, miny, maxy)
+        save: bool whether to save the clipped array or not
+        path: str with the path where the clipped array will be saved
+        crs: str or dict containing the CRS of the array, must be provided if the clipped array is saved
+    Return:
+        clipped_array: np.ndarray view of the clipped area
+        clipped_extent: list of the extent of the clipped area (minx, maxx, miny, maxy)
+        clipped_transform: affine transform of the clipped area as saved by save_as_tiff
+    """
+
+    # Checking if the extent is of type list
+    if not isinstance(extent, list):
+        raise TypeError('Extent of the raster must be of type list')
+
+    # Checking if the CRS is provided when saving
+    if save and crs is None:
+        raise ValueError('CRS must be provided to save the clipped array')
+
+    # Calculating the resolution of the array
+    res_x = (extent[1] - extent[0]) / array.shape[1]
+    res_y = (extent[3] - extent[2]) / array.shape[0]
+
+    # Calculating the columns and rows of all cells intersecting the bbox, limited to the array
+    col_start = max(int(np.floor((bbox[0] - extent[0]) / res_x)), 0)
+    col_stop = min(int(np.ceil((bbox[1] - extent[0]) / res_x)), array.shape[1])
+    row_start = max(int(np.floor((bbox[2] - extent[2]) / res_y)), 0)
+    row_stop = min(int(np.ceil((bbox[3] - extent[2]) / res_y)), array.shape[0])
+
+    # Checking if the bbox intersects the array
+    if col_stop <= col_start or row_stop <= row_start:
+        raise ValueError('Extent does not intersect the raster')
+
+    # Slicing the array creates a view without copying the data
+    clipped_array = array[row_start:row_stop, col_start:col_stop]
+
+    clipped_extent = [extent[0] + col_start * res_x,
+                      extent[0] + col_stop * res_x,
+                      extent[2] + row_start * res_y,
+                      extent[2] + row_stop * res_y]
+
+    clipped_transform = rasterio.transform.from_bounds(clipped_extent[0], clipped_extent[2], clipped_extent[1],
+                                                       clipped_extent[3], clipped_array.shape[1],
+                                                       clipped_array.shape[0])
+
+    if save:
+        save_as_tiff(path, clipped_array, clipped_extent, crs)
+
+    return clipped_array, clipped_extent, clipped_transform
+
+
+def _clip_by_window(raster: rasterio.io.DatasetReader,
+                    bbox: shapely.geometry.polygon.Polygon,
+                    bbox_crs: Union[str, rasterio.crs.CRS],
+                    save: bool = True,
+                    path: str = 'clipped.tif') -> tuple:
+    """
+    Clipping a rasterio raster by reading only the window containing a bounding box
+    Args:
+        raster: rasterio object to be clipped
+        bbox: shapely polygon containing the coordinates for the bounding box
+        bbox_crs: str or rasterio CRS containing the crs of the bounding box
+        save: bool whether to save the clipped raster or not
+        path: str with the path where the rasterio object will be saved
+    Return:
+        clipped_array: np.ndarray of the clipped area
+        extent: list of the extent of the clipped area (minx, maxx, miny, maxy)
+        clipped_transform: affine transform of the clipped area
+    """
+
+    # Transforming the bbox to the CRS of the raster
+    if bbox_crs != raster.crs:
+        transformer = get_transformer(bbox_crs, raster.crs)
+        bbox = shapely.transform(bbox, lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1])))
+
+    # Creating the window containing all cells intersecting the bbox
+    window = _window_from_bounds(bbox.bounds, raster.transform, raster.height, raster.width)
+
+    # Reading only the window of the raster
+    clipped_array = raster.read(1, window=window)
+    clipped_transform = rasterio.windows.transform(window, raster.transform)
+    left, bottom, right, top = rasterio.windows.bounds(window, raster.transform)
+
+    # Checking if clipped raster is to be saved
+    if save:
+        clipped_meta = raster.meta.copy()
+        clipped_meta.update({"driver": "GTiff",
+                             "height": clipped_array.shape[0],
+                             "width": clipped_array.shape[1],
+                             "count": 1,
+                             "transform": clipped_transform})
+
+        with rasterio.open(path, "w", **clipped_meta) as dest:
+            dest.write(clipped_array, 1)
+
+    return clipped_array, [left, right, bottom, top], clipped_transform
+
+
+def _window_from_bounds(bounds: tuple,
+                        transform: rasterio.Affine,
+                        height: int,
+                        width: int) -> Window:
+    """
+    Creating the window of all cells of a raster intersecting the given bounds
+    Args:
+        bounds: tuple of the bounds (minx, miny, maxx, maxy)
+        transform: affine transform of the raster
+        height: int of the number of rows of the raster
+        width: int of the number of columns of the raster
+    Return:
+        window: rasterio.windows.Window limited to the raster
+    """
+
+    window = rasterio.windows.from_bounds(*bounds, transform=transform)
+
+    # Rounding the window outwards to whole cells and limiting it to the raster
+    col_start = max(int(np.floor(window.col_off)), 0)
+    row_start = max(int(np.floor(window.row_off)), 0)
+    col_stop = min(int(np.ceil(window.col_off + window.width)), width)
+    row_stop = min(int(np.ceil(window.row_off + window.height)), height)
+
+    # Checking if the bounds intersect the raster
+    if col_stop <= col_start or row_stop <= row_start:
+        raise ValueError('Extent does not intersect the raster')
+
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+
 # Function tested
 def clip_by_shape(raster: Union[rasterio.io.DatasetReader, np.ndarray],
                   shape: gpd.geodataframe.GeoDataFrame,
@@ -871,3 +2488,328 @@ def clip_by_shape(raster: Union[rasterio.io.DatasetReader, np.ndarray],
     clipped_array = clip_by_extent(raster, bbox, bbox_crs=shape.crs, save=save, path=path)
 
     return clipped_array
+
+
+# Function tested
+def clip_by_shapes(raster: rasterio.io.DatasetReader,
+                   shapes: gpd.geodataframe.GeoDataFrame,
+                   **kwargs) -> List[tuple]:
+    """
+    Clipping a rasterio raster by each polygon of a GeoDataFrame in a single pass over the raster. The windows of the
+    polygons are processed sorted by their position so that each block of the raster is read only once
+    Args:
+        raster: rasterio object to be clipped
+        shapes: GeoDataFrame containing the polygons
+    Kwargs:
+        masked: bool whether the cells outside of the polygons are set to nodata, default is True
+        nodata: int or float of the value of the cells outside of the polygons, default is the nodata value of the
+                raster or 0
+        all_touched: bool whether all cells touched by a polygon are kept when masking, default is False
+        paths: list of str with the paths where the clipped rasters will be saved, one for each polygon
+        workers: int of the number of polygons masked in parallel, default is 1
+    Return:
+        list containing a tuple of the np.ndarray, the extent and the transform of the clipped area of each polygon
+    """
+
+    # Checking that the raster is a rasterio object
+    if not isinstance(raster, rasterio.io.DatasetReader):
+        raise TypeError('Raster must be a rasterio object')
+
+    # Checking if shapes is of type GeoDataFrame
+    if not isinstance(shapes, gpd.geodataframe.GeoDataFrame):
+        raise TypeError('Shapes must be of type GeoDataFrame')
+
+    masked = kwargs.get('masked', True)
+    nodata = kwargs.get('nodata', raster.nodata if raster.nodata is not None else 0)
+    all_touched = kwargs.get('all_touched', False)
+    paths = kwargs.get('paths', None)
+
+    # Checking if masked and all_touched are of type bool
+    if not isinstance(masked, bool) or not isinstance(all_touched, bool):
+        raise TypeError('masked and all_touched must be of type bool')
+
+    # Checking if nodata is of type int or float
+    if not isinstance(nodata, (int, float)):
+        raise TypeError('nodata must be of type int or float')
+
+    # Checking if the paths are provided as list of strings for each polygon
+    if paths is not None:
+        if not isinstance(paths, list) or not all(isinstance(n, str) for n in paths):
+            raise TypeError('Paths must be provided as list of strings')
+        if len(paths) != len(shapes):
+            raise ValueError('One path must be provided for each polygon')
+
+    workers, executor = _check_workers(kwargs.get('workers', 1), 'thread')
+
+    # Converting the shapes to the CRS of the raster
+    if shapes.crs is not None and shapes.crs != raster.crs:
+        shapes = shapes.to_crs(raster.crs)
+
+    geometries = shapes.geometry.values
+
+    # Creating the windows of all polygons
+    windows = [_window_from_bounds(geometry.bounds, raster.transform, raster.height, raster.width)
+               for geometry in geometries]
+
+    # Processing the polygons sorted by the position of their windows
+    order = sorted(range(len(windows)), key=lambda i: (windows[i].row_off, windows[i].col_off))
+
+    reader = _BlockReader(raster)
+
+    # Reading the windows in the main thread, the blocks are read only once
+    def tiles():
+        for i in order:
+            window = windows[i]
+            yield i, (reader.read(window),
+                      geometries[i] if masked else None,
+                      rasterio.windows.transform(window, raster.transform),
+                      nodata,
+                      all_touched)
+
+    clipped = [None] * len(windows)
+    for i, clipped_array in _map_tiles(_mask_window, tiles(), workers, 'thread'):
+        window = windows[i]
+        clipped_transform = rasterio.windows.transform(window, raster.transform)
+        left, bottom, right, top = rasterio.windows.bounds(window, raster.transform)
+
+        # Saving the clipped raster
+        if paths is not None:
+            clipped_meta = raster.meta.copy()
+            clipped_meta.update({"driver": "GTiff",
+                                 "height": clipped_array.shape[0],
+                                 "width": clipped_array.shape[1],
+                                 "count": 1,
+                                 "nodata": nodata if masked else raster.nodata,
+                                 "transform": clipped_transform})
+
+            with rasterio.open(paths[i], "w", **clipped_meta) as dest:
+                dest.write(clipped_array, 1)
+
+        clipped[i] = (clipped_array, [left, right, bottom, top], clipped_transform)
+
+    return clipped
+
+
+def _mask_window(array: np.ndarray,
+                 geometry: shapely.geometry.base.BaseGeometry,
+                 transform: rasterio.Affine,
+                 nodata: Union[int, float],
+                 all_touched: bool = False) -> np.ndarray:
+    """
+    Setting the cells of a window outside of a geometry to nodata
+    Args:
+        array: np.ndarray of the window
+        geometry: shapely geometry, if None the array is returned unchanged
+        transform: affine transform of the window
+        nodata: int or float of the value of the cells outside of the geometry
+        all_touched: bool whether all cells touched by the geometry are kept
+    Return:
+        array: np.ndarray of the masked window
+    """
+
+    if geometry is not None:
+        outside = geometry_mask([geometry], out_shape=array.shape, transform=transform, all_touched=all_touched)
+        array[outside] = nodata
+
+    return array
+
+
+class _BlockReader(object):
+    """
+    Reading windows of the first band of a raster block by block, each block is kept in a cache until no window
+    sorted by its row offset can overlap it anymore. Contiguous strips are merged to blocks of at least 256 rows
+    """
+
+    def __init__(self, raster: rasterio.io.DatasetReader):
+        self.raster = raster
+        self.block_height, self.block_width = _block_shape(raster)
+        self.blocks = {}
+
+    def read(self, window: Window) -> np.ndarray:
+        """
+        Reading a window, the windows must be read sorted by their row offset
+        Args:
+            window: rasterio.windows.Window to be read
+        Return:
+            array: np.ndarray of the window
+        """
+
+        row_start, col_start = int(window.row_off), int(window.col_off)
+        row_stop, col_stop = row_start + int(window.height), col_start + int(window.width)
+
+        # Removing the blocks above the window from the cache
+        first_block_row = row_start // self.block_height
+        for key in [key for key in self.blocks if key[0] < first_block_row]:
+            del self.blocks[key]
+
+        array = np.empty((row_stop - row_start, col_stop - col_start), dtype=self.raster.dtypes[0])
+
+        # Copying the parts of all blocks overlapping the window
+        for block_row in range(first_block_row, (row_stop - 1) // self.block_height + 1):
+            for block_col in range(col_start // self.block_width, (col_stop - 1) // self.block_width + 1):
+                block = self.blocks.get((block_row, block_col))
+                if block is None:
+                    block = self.raster.read(1, window=Window(block_col * self.block_width,
+                                                              block_row * self.block_height,
+                                                              min(self.block_width,
+                                                                  self.raster.width - block_col * self.block_width),
+                                                              min(self.block_height,
+                                                                  self.raster.height - block_row * self.block_height)))
+                    self.blocks[(block_row, block_col)] = block
+
+                # Calculating the overlap of the block and the window
+                r0 = max(row_start, block_row * self.block_height)
+                r1 = min(row_stop, block_row * self.block_height + block.shape[0])
+                c0 = max(col_start, block_col * self.block_width)
+                c1 = min(col_stop, block_col * self.block_width + block.shape[1])
+
+                array[r0 - row_start:r1 - row_start, c0 - col_start:c1 - col_start] = \
+                    block[r0 - block_row * self.block_height:r1 - block_row * self.block_height,
+                          c0 - block_col * self.block_width:c1 - block_col * self.block_width]
+
+        return array
+
+
+# Class tested
+class RasterHandle(rasterio.io.DatasetReader):
+    """
+    This class opens a raster like rasterio.open and can be passed to all functions accepting rasterio objects. The
+    first band is read only once, either into memory or into a memory-mapped file, and all subsequent reads of the
+    full band or of windows of it are served from this array without accessing the file again
+
+    The following attributes are available in addition to the ones of rasterio objects:
+    - array: np.ndarray - read-only array or np.memmap of the first band, the first row corresponds to the top of
+    the raster
+    - extent: list - List containing the minx, maxx, miny and maxy values of the raster
+    """
+
+    def __init__(self, path: str, memmap: bool = False, memmap_path: str = None):
+        """
+        Args:
+            path: str with the path of the raster
+            memmap: bool whether the first band is stored in a memory-mapped file instead of in memory
+            memmap_path: str with the path of the .npy file used for memory-mapping, by default a temporary file is
+            created that is removed when the raster is closed
+        """
+
+        # Checking if path is of type string
+        if not isinstance(path, str):
+            raise TypeError('Path must be of type string')
+
+        # Checking if memmap is of type bool
+        if not isinstance(memmap, bool):
+            raise TypeError('memmap must be of type bool')
+
+        # Checking if memmap_path is of type string
+        if not isinstance(memmap_path, (str, type(None))):
+            raise TypeError('memmap_path must be of type string')
+
+        self._array = None
+        self._memmap = memmap
+        self._memmap_path = memmap_path
+        self._temporary_file = None
+        self._finalizer = None
+
+        with rasterio.Env():
+            super().__init__(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def array(self) -> np.ndarray:
+        # Reading the first band at the first access
+        if self._array is None:
+            if self._memmap:
+                # Creating a temporary file if no path is provided, it is removed when the raster is closed or
+                # garbage collected
+                if self._memmap_path is None:
+                    handle, self._temporary_file = tempfile.mkstemp(suffix='.npy')
+                    os.close(handle)
+                    self._finalizer = weakref.finalize(self, _remove_file, self._temporary_file)
+
+                # Writing the band block by block to the memory-mapped file
+                array = np.lib.format.open_memmap(self._memmap_path or self._temporary_file,
+                                                  mode='w+',
+                                                  dtype=self.dtypes[0],
+                                                  shape=(self.height, self.width))
+                for _, window in self.block_windows(1):
+                    array[window.toslices()] = super().read(1, window=window)
+                array.flush()
+                del array
+
+                self._array = np.load(self._memmap_path or self._temporary_file, mmap_mode='r')
+            else:
+                self._array = super().read(1)
+                self._array.flags.writeable = False
+
+        return self._array
+
+    @property
+    def extent(self) -> List[Union[int, float]]:
+        return [self.bounds.left, self.bounds.right, self.bounds.bottom, self.bounds.top]
+
+    def read(self, indexes=None, out=None, window=None, masked=False, out_shape=None, boundless=False, **kwargs):
+        """
+        Reading the raster like rasterio, reads of the full first band or windows of it are served from the array
+        """
+
+        # Checking if the first band is requested
+        if indexes == 1 or (isinstance(indexes, list) and indexes == [1]) or (indexes is None and self.count == 1):
+            # Checking if the read can be served from the array
+            if out is None and not masked and out_shape is None and not boundless and not kwargs and \
+                    (window is None or _is_inner_window(window, self.height, self.width)):
+                array = self.array if window is None else self.array[Window(*window.flatten()).toslices()]
+                return array if indexes == 1 else array[np.newaxis]
+
+        return super().read(indexes, out=out, window=window, masked=masked, out_shape=out_shape, boundless=boundless,
+                            **kwargs)
+
+    def close(self):
+        """
+        Closing the raster and removing the temporary memory-mapped file
+        """
+
+        self._array = None
+        super().close()
+
+        if self._finalizer is not None:
+            self._finalizer()
+            self._temporary_file = None
+
+
+def _remove_file(path: str):
+    """
+    Removing a file if it exists
+    Args:
+        path: str with the path of the file
+    """
+
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _is_inner_window(window, height: int, width: int) -> bool:
+    """
+    Checking if a window consists of whole cells within the raster
+    Args:
+        window: rasterio.windows.Window or tuple of ranges
+        height: int of the number of rows of the raster
+        width: int of the number of columns of the raster
+    Return:
+        bool whether the window consists of whole cells within the raster
+    """
+
+    if not isinstance(window, Window):
+        return False
+
+    values = window.flatten()
+    if not all(float(n).is_integer() for n in values):
+        return False
+
+    col_off, row_off, columns, rows = (int(n) for n in values)
+
+    return col_off >= 0 and row_off >= 0 and col_off + columns <= width and row_off + rows <= height
@@ -26,6 +26,8 @@ import pandas as pd
 import rasterio
 import shapely
 import xmltodict
+import pyproj
+from functools import lru_cache
 from shapely.geometry import box, LineString, Point
 from typing import Union, List
 from gemgis import vector
@@ -288,25 +290,64 @@ def getFeatures(extent: Union[List[Union[int, float]], type(None)],
     if not isinstance(bbox, shapely.geometry.polygon.Polygon):
         raise TypeError('Bbox is not of type shapely box')
 
-    if isinstance(crs_raster, rasterio.crs.CRS):
-        crs_raster = crs_raster.to_dict()
+    # Transforming the coordinates of the bbox with a cached transformer
+    transformer = get_transformer(crs_bbox, crs_raster)
+    bbox = shapely.transform(bbox, lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1])))
 
-    if isinstance(crs_bbox, rasterio.crs.CRS):
-        crs_bbox = crs_bbox.to_dict()
+    # Converting the bbox to a GeoJSON dict containing lists of coordinates
+    return [json.loads(shapely.to_geojson(bbox))]
 
-    # Converting raster crs to dict
-    if isinstance(crs_raster, str):
-        crs_raster = {'init': crs_raster}
 
-    # Converting bbox raster to dict
-    if isinstance(crs_bbox, str):
-        crs_bbox = {'init': crs_bbox}
+# Function tested
+def get_transformer(crs_from: Union[str, dict, pyproj.CRS, rasterio.crs.CRS],
+                    crs_to: Union[str, dict, pyproj.CRS, rasterio.crs.CRS]) -> pyproj.Transformer:
+    """
+    Getting a transformer between two CRS from a bounded cache, the transformer is only created at the first call
+    for a pair of CRS and reused for subsequent calls
+    Args:
+        crs_from - string, dict, pyproj.CRS or rasterio CRS of the coordinates to be transformed
+        crs_to - string, dict, pyproj.CRS or rasterio CRS the coordinates are transformed to
+    Return:
+        pyproj.Transformer transforming x,y coordinates from crs_from to crs_to
+    """
+
+    # Checking if the CRSs are of a supported type
+    if not isinstance(crs_from, (str, dict, pyproj.CRS, rasterio.crs.CRS)):
+        raise TypeError('CRS must be of type string, dict, pyproj.CRS or a rasterio CRS')
+
+    if not isinstance(crs_to, (str, dict, pyproj.CRS, rasterio.crs.CRS)):
+        raise TypeError('CRS must be of type string, dict, pyproj.CRS or a rasterio CRS')
+
+    # Converting dicts as they cannot be used as keys of the cache
+    if isinstance(crs_from, dict):
+        crs_from = pyproj.CRS.from_user_input(crs_from)
+
+    if isinstance(crs_to, dict):
+        crs_to = pyproj.CRS.from_user_input(crs_to)
+
+    return _get_transformer(crs_from, crs_to)
 
-    # Creating GeoDataFrame
-    gdf = gpd.GeoDataFrame({'geometry': bbox}, index=[0], crs=crs_bbox)
-    gdf = gdf.to_crs(crs=crs_raster)
 
-    return [json.loads(gdf.to_json())['features'][0]['geometry']]
+@lru_cache(maxsize=128)
+def _get_transformer(crs_from, crs_to) -> pyproj.Transformer:
+    """
+    Creating a transformer between two CRS, the result is cached by get_transformer
+    Args:
+        crs_from - CRS of the coordinates to be transformed
+        crs_to - CRS the coordinates are transformed to
+    Return:
+        pyproj.Transformer transforming x,y coordinates from crs_from to crs_to
+    """
+
+    return pyproj.Transformer.from_crs(crs_from, crs_to, always_xy=True)
+
+
+def clear_transformer_cache():
+    """
+    Removing all transformers from the cache used by get_transformer
+    """
+
+    _get_transformer.cache_clear()
 
 
 # Function tested
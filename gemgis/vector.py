@@ -22,28 +22,55 @@ GNU General Public License (LICENSE.md) for more details.
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+import pickle
 import rasterio
+import shapely
+from rasterio.windows import Window
 from typing import Union, List
-from scipy.interpolate import griddata, Rbf
-from gemgis.raster import sample
-from gemgis.utils import set_extent
+from scipy.interpolate import Rbf, RBFInterpolator, NearestNDInterpolator, LinearNDInterpolator, \
+    CloughTocher2DInterpolator
+from scipy.spatial import cKDTree, Delaunay
+from gemgis.raster import sample_points, sample_blockwise
+from gemgis.utils import get_transformer
 
 
 # Function tested
 def extract_xy(gdf: gpd.geodataframe.GeoDataFrame,
-               inplace: bool = False) -> gpd.geodataframe.GeoDataFrame:
+               inplace: bool = False,
+               **kwargs) -> Union[gpd.geodataframe.GeoDataFrame, pd.DataFrame]:
     """
     Extracting x,y coordinates from a GeoDataFrame (Points or LineStrings) and returning a GeoDataFrame with x,y coordinates as additional columns
     Args:
         gdf - gpd.geodataframe.GeoDataFrame created from shape file
         inplace - bool - default False -> copy of the current gdf is created
+    Kwargs:
+        vertex_table - bool - default False -> if True, a compact table with one row per vertex is returned
+        containing the X, Y (and Z) coordinates, the index of the parent geometry and the attributes, string
+        attributes are stored as categoricals and the parent geometries are not copied
+        create_points - bool - default False -> if True, the vertex table is returned as GeoDataFrame with
+        Point geometries
     Return:
-        gdf - gpd.geodataframe.GeoDataFrame with appended x,y columns
+        gdf - gpd.geodataframe.GeoDataFrame with appended x,y columns, or the vertex table
     """
 
     # Input object must be a GeoDataFrame
     assert isinstance(gdf, gpd.geodataframe.GeoDataFrame), 'Loaded object is not a GeoDataFrame'
 
+    vertex_table = kwargs.get('vertex_table', False)
+    create_points = kwargs.get('create_points', False)
+
+    # Checking if vertex_table is of type bool
+    if not isinstance(vertex_table, bool):
+        raise TypeError('vertex_table must be of type bool')
+
+    # Checking if create_points is of type bool
+    if not isinstance(create_points, bool):
+        raise TypeError('create_points must be of type bool')
+
+    # Creating the vertex table without copying the gdf
+    if vertex_table:
+        return _extract_vertex_table(gdf, create_points)
+
     # Store CRS of gdf
     crs = gdf.crs
 
@@ -56,16 +83,25 @@ def extract_xy(gdf: gpd.geodataframe.GeoDataFrame,
         gdf['X'] = gdf.geometry.x
         gdf['Y'] = gdf.geometry.y
 
-    # Convert MultiLineString to LineString for further processing
-    if all(gdf.geom_type == "MultiLineString"):
-        gdf = gdf.explode()
-
     # Extract x,y coordinates from line shape file
-    if all(gdf.geom_type == "LineString"):
-        gdf['points'] = [list(geometry.coords) for geometry in gdf.geometry]
-        df = pd.DataFrame(gdf).explode('points')
-        df[['X', 'Y']] = pd.DataFrame(df['points'].tolist(), index=df.index)
-        gdf = gpd.GeoDataFrame(df, geometry=df.geometry, crs=crs)
+    if all(gdf.geom_type.isin(["LineString", "MultiLineString"])):
+
+        # Convert MultiLineString to LineString for further processing
+        if any(gdf.geom_type == "MultiLineString"):
+            gdf = gdf.explode(index_parts=False)
+
+        # Extract the coordinates of all vertices at once together with the index of their LineString
+        include_z = bool(gdf.has_z.any())
+        coordinates, index = shapely.get_coordinates(gdf.geometry.values, include_z=include_z, return_index=True)
+
+        # Repeat the rows of each LineString for its vertices
+        gdf = gpd.GeoDataFrame(gdf.iloc[index], geometry=gdf.geometry.name, crs=crs)
+        gdf['X'] = coordinates[:, 0]
+        gdf['Y'] = coordinates[:, 1]
+
+        # Use the Z coordinates of the vertices if no Z values are provided as attribute
+        if include_z and not pd.Series(['Z']).isin(gdf.columns).all():
+            gdf['Z'] = coordinates[:, 2]
 
     # Convert dip and azimuth columns to floats
     if pd.Series(['dip']).isin(gdf.columns).all():
@@ -81,6 +117,51 @@ def extract_xy(gdf: gpd.geodataframe.GeoDataFrame,
     return gdf
 
 
+def _extract_vertex_table(gdf: gpd.geodataframe.GeoDataFrame,
+                          create_points: bool = False) -> Union[gpd.geodataframe.GeoDataFrame, pd.DataFrame]:
+    """
+    Extracting a table with one row per vertex from a GeoDataFrame without copying the parent geometries
+    Args:
+        gdf - gpd.geodataframe.GeoDataFrame created from shape file
+        create_points - bool - default False -> if True, a GeoDataFrame with Point geometries is returned
+    Return:
+        df - pd.DataFrame containing X, Y (and Z) coordinates, the parent index and the attributes of each vertex
+    """
+
+    # Extracting the coordinates of all vertices together with the position of their parent geometry
+    include_z = bool(gdf.has_z.any())
+    coordinates, index = shapely.get_coordinates(gdf.geometry.values, include_z=include_z, return_index=True)
+
+    df = pd.DataFrame({'X': coordinates[:, 0], 'Y': coordinates[:, 1]})
+
+    # Using the Z coordinates of the vertices if no Z values are provided as attribute
+    if include_z and not pd.Series(['Z']).isin(gdf.columns).all():
+        df['Z'] = coordinates[:, 2]
+
+    df['parent'] = gdf.index.to_numpy()[index]
+
+    # Repeating the attributes for the vertices, strings are stored as categories
+    for column in gdf.columns:
+        if column in [gdf.geometry.name, 'X', 'Y', 'parent']:
+            continue
+
+        values = gdf[column]
+        if column in ['dip', 'azimuth']:
+            values = values.astype(float)
+        elif values.dtype == object or pd.api.types.is_string_dtype(values):
+            values = values.astype('category')
+
+        df[column] = values.iloc[index].reset_index(drop=True)
+
+    # Creating Point geometries from the coordinates
+    if create_points:
+        df = gpd.GeoDataFrame(df,
+                              geometry=gpd.points_from_xy(df['X'], df['Y'], df['Z'] if 'Z' in df else None),
+                              crs=gdf.crs)
+
+    return df
+
+
 # Function tested
 def extract_z(gdf: gpd.geodataframe.GeoDataFrame, dem: Union[np.ndarray, rasterio.io.DatasetReader],
               inplace: bool = False, **kwargs) -> gpd.geodataframe.GeoDataFrame:
@@ -92,6 +173,7 @@ def extract_z(gdf: gpd.geodataframe.GeoDataFrame, dem: Union[np.ndarray, rasteri
         inplace - bool - default False -> copy of the current gdf is created
     Kwargs:
         extent - list containing the extent of the np.ndarray, must be provided in the same CRS as the gdf
+        interpolation - str defining how the z values are obtained from the DEM (nearest, bilinear, bicubic)
     Return:
         gdf - gpd.geodataframe.GeoDataFrame containing x,y,z values obtained from a DEM
     """
@@ -112,24 +194,22 @@ def extract_z(gdf: gpd.geodataframe.GeoDataFrame, dem: Union[np.ndarray, rasteri
     if pd.Series(['Z']).isin(gdf.columns).all():
         raise ValueError('Data already contains Z-values')
 
-    # Extracting z values from a DEM loaded with Rasterio
+    # Getting the interpolation method
+    interpolation = kwargs.get('interpolation', 'nearest')
+
+    # Extracting z values from a DEM loaded with Rasterio, only the blocks of the DEM containing points are read
     if isinstance(dem, rasterio.io.DatasetReader):
-        try:
-            if gdf.crs == dem.crs:
-                if np.logical_not(pd.Series(['X', 'Y']).isin(gdf.columns).all()):
-                    gdf = extract_xy(gdf)
-                gdf['Z'] = [z[0] for z in dem.sample(gdf[['X', 'Y']].to_numpy())]
-            else:
-                crs_old = gdf.crs
-                gdf = gdf.to_crs(crs=dem.crs)
-                gdf = extract_xy(gdf)
-                gdf['Z'] = [z[0] for z in dem.sample(gdf[['X', 'Y']].to_numpy())]
-                gdf = gdf.to_crs(crs=crs_old)
-                del gdf['X']
-                del gdf['Y']
-                gdf = extract_xy(gdf)
-        except IndexError:
-            raise ValueError('One or more points are located outside the boundaries of the raster')
+        if np.logical_not(pd.Series(['X', 'Y']).isin(gdf.columns).all()):
+            gdf = extract_xy(gdf)
+
+        points = gdf[['X', 'Y']].to_numpy()
+
+        # Transforming only the coordinates to the CRS of the DEM, the geometries remain untouched
+        if gdf.crs != dem.crs:
+            transformer = get_transformer(gdf.crs, dem.crs)
+            points = np.column_stack(transformer.transform(points[:, 0], points[:, 1]))
+
+        gdf['Z'] = sample_blockwise(dem, points, interpolation=interpolation)
 
     # Extracting z values from a DEM as np.ndarray
     else:
@@ -140,8 +220,7 @@ def extract_z(gdf: gpd.geodataframe.GeoDataFrame, dem: Union[np.ndarray, rasteri
 
         assert extent is not None, 'Extent of array is needed to extract Z values'
 
-        gdf['Z'] = [sample(dem, extent, gdf[['X', 'Y']].values.tolist()[i]) for i, point in
-                    enumerate(gdf[['X', 'Y']].values.tolist())]
+        gdf['Z'] = sample_points(dem, extent, gdf[['X', 'Y']].to_numpy(), interpolation=interpolation)
 
     # Convert dip and azimuth columns to floats
     if pd.Series(['dip']).isin(gdf.columns).all():
@@ -168,6 +247,7 @@ def extract_coordinates(gdf: gpd.geodataframe.GeoDataFrame,
         dem - rasterio.io.DatasetReader containing the z values
     Kwargs:
         extent - list containing the extent of the np.ndarray, must be provided in the same CRS as the gdf
+        interpolation - str defining how the z values are obtained from the DEM (nearest, bilinear, bicubic)
     Return:
         gdf - gpd.geodataframe.GeoDataFrame containing x, y and z values
     """
@@ -190,45 +270,12 @@ def extract_coordinates(gdf: gpd.geodataframe.GeoDataFrame,
         if not isinstance(dem, (np.ndarray, rasterio.io.DatasetReader)):
             raise TypeError('Loaded object is not a np.ndarray or Rasterio object')
 
-        extent = kwargs.get('extent', None)
-
-        # Checking if X and Y column already exist in gdf
-        if np.logical_not(pd.Series(['X', 'Y']).isin(gdf.columns).all()):
-            if isinstance(dem, np.ndarray):
-                gdf = extract_z(gdf, dem, extent=extent)
-            # Extract XYZ values if dem is rasterio object
-            else:
-                # Extract XYZ values if CRSs are matching
-                if gdf.crs == dem.crs:
-                    gdf = extract_z(gdf, dem)
-                # Convert gdf before XYZ values extraction
-                else:
-                    crs_old = gdf.crs
-                    gdf = gdf.to_crs(crs=dem.crs)
-                    gdf.rename(columns={'X': 'X1', 'Y': 'Y1'})
-                    gdf = extract_z(extract_xy(gdf), dem)
-                    gdf = gdf.to_crs(crs=crs_old)
-                    del gdf['X']
-                    del gdf['Y']
-                    gdf.rename(columns={'X1': 'X', 'Y1': 'Y'})
-        else:
-            # Extract XYZ values if dem is of type np.ndarray
-            if isinstance(dem, np.ndarray):
-                gdf = extract_z(extract_xy(gdf), dem, extent=extent)
-            # Extract XYZ values if dem is rasterio object
-            else:
-                # Extract XYZ values if CRSs are matching
-                if gdf.crs == dem.crs:
-                    gdf = extract_z(extract_xy(gdf), dem)
-                # Convert gdf before XYZ values extraction
-                else:
-                    crs_old = gdf.crs
-                    gdf = gdf.to_crs(crs=dem.crs)
-                    gdf = extract_z(extract_xy(gdf), dem)
-                    gdf = gdf.to_crs(crs=crs_old)
-                    del gdf['X']
-                    del gdf['Y']
-                    gdf = extract_xy(gdf)
+        # Extracting the XYZ values, the coordinates are transformed by extract_z if the CRSs are not matching
+        gdf = extract_z(gdf,
+                        dem,
+                        inplace=True,
+                        extent=kwargs.get('extent', None),
+                        interpolation=kwargs.get('interpolation', 'nearest'))
     else:
         # Checking if X and Y column already exist in gdf
         if np.logical_not(pd.Series(['X', 'Y']).isin(gdf.columns).all()):
@@ -254,10 +301,19 @@ def interpolate_raster(gdf: gpd.geodataframe.GeoDataFrame, method: str = 'neares
     Interpolate raster/digital elevation model from point or line shape file
     Args:
         gdf - gpd.geodataframe.GeoDataFrame containing the z values of an area
-        method - string which method of griddata is supposed to be used (nearest,linear,cubic,rbf)
+        method - string which method of griddata is supposed to be used (nearest,linear,cubic,rbf), or a local
+        method using only the nearest neighbours of each cell (idw, local_rbf)
         res - resolution of the raster in x and y direction
+    Kwargs:
+        neighbors - int of the number of nearest neighbours used by idw and local_rbf, default is 16
+        power - int, float of the power of the inverse distance weights of idw, default is 2
+        kernel - string of the radial basis function of local_rbf, default is 'thin_plate_spline'
+        chunk_size - int of the number of rows of the grid evaluated at once, default is 256
+        out - np.ndarray or np.memmap of the shape of the grid the raster is written to
+        path - string of the path of a GeoTIFF the raster is written to instead of returning it
+        crs - string of the CRS of the GeoTIFF, default is the CRS of the gdf
     Return:
-         np.array as interpolated raster/digital elevation model
+         np.array as interpolated raster/digital elevation model, None if a path is provided
     """
 
 
@@ -304,38 +360,307 @@ def interpolate_raster(gdf: gpd.geodataframe.GeoDataFrame, method: str = 'neares
     if not isinstance(res, int):
         raise TypeError('resolution must be of type int')
 
-    # Creating a meshgrid based on the gdf bounds
-    x = np.arange(gdf.bounds.minx.min(), gdf.bounds.maxx.max(), res)
-    y = np.arange(gdf.bounds.miny.min(), gdf.bounds.maxy.max(), res)
-    xx, yy = np.meshgrid(x, y)
-
-    try:
-        # Interpolating the raster
-        if any([method == 'nearest', method == 'linear', method == 'cubic']):
-            array = griddata((gdf['X'], gdf['Y']), gdf['Z'], (xx, yy), method=method)
-        elif method == 'rbf':
-            function = kwargs.get('function', 'multiquadric')
-            epsilon = kwargs.get('epsilon', 2)
-            rbf = Rbf(gdf['X'], gdf['Y'], gdf['Z'], function=function, epsilon=epsilon)
-            array = rbf(xx, yy)
-        else:
-            raise ValueError('No valid method defined')
-    except np.linalg.LinAlgError:
-        raise ValueError('LinAlgError: reduce the number of points by setting a value for n')
+    # Creating the interpolator and evaluating it on the grid
+    interpolator = Interpolator(gdf, method, **kwargs)
+
+    array = interpolator.grid(res=res,
+                              chunk_size=kwargs.get('chunk_size', 256),
+                              out=kwargs.get('out', None),
+                              path=kwargs.get('path', None),
+                              crs=kwargs.get('crs', None))
 
     return array
 
 
+# Class tested
+class Interpolator(object):
+    """
+    This class creates an interpolator from the Z values of a GeoDataFrame that can be evaluated repeatedly on
+    arbitrary grids or points. The triangulation, the RBF weights or the KD-tree are built once when the object is
+    created and reused for every evaluation
+
+    The following attributes are available:
+    - method: string - the interpolation method (nearest, linear, cubic, rbf, idw, local_rbf)
+    - crs: pyproj.CRS - the coordinate reference system of the GeoDataFrame
+    - bounds: list - List containing the minx, maxx, miny and maxy values of the data points
+    - points: np.ndarray - Array of shape (n, 2) containing the X and Y coordinates of the data points
+    - values: np.ndarray - Array of shape (n,) containing the Z values of the data points
+    """
+
+    def __init__(self, gdf: gpd.geodataframe.GeoDataFrame, method: str = 'nearest', **kwargs):
+        """
+        Args:
+            gdf - gpd.geodataframe.GeoDataFrame containing the z values of an area
+            method - string of the interpolation method (nearest, linear, cubic, rbf, idw, local_rbf)
+        Kwargs:
+            see interpolate_raster
+        """
+
+        # Checking if the gdf is of type GeoDataFrame
+        if not isinstance(gdf, gpd.geodataframe.GeoDataFrame):
+            raise TypeError('gdf mus be of type GeoDataFrame')
+
+        # Checking if Z values are in the gdf
+        if np.logical_not(pd.Series(['Z']).isin(gdf.columns).all()):
+            raise ValueError('Z-values not defined')
+
+        # Checking if XY values are in the gdf
+        if np.logical_not(pd.Series(['X', 'Y']).isin(gdf.columns).all()):
+            gdf = extract_xy(gdf)
+
+        # Checking that the method provided is of type string
+        if not isinstance(method, str):
+            raise TypeError('Method must be of type string')
+
+        self.method = method
+        self.crs = gdf.crs
+        self.bounds = [gdf.bounds.minx.min(), gdf.bounds.maxx.max(), gdf.bounds.miny.min(), gdf.bounds.maxy.max()]
+        self.points = gdf[['X', 'Y']].to_numpy(dtype=float)
+        self.values = gdf['Z'].to_numpy(dtype=float)
+
+        try:
+            self._interpolator = _create_interpolator(self.points, self.values, method, **kwargs)
+        except np.linalg.LinAlgError:
+            raise ValueError('LinAlgError: reduce the number of points by setting a value for n')
+
+    def __call__(self, points: np.ndarray) -> np.ndarray:
+        """
+        Evaluate the interpolator at points
+        Args:
+            points - np.ndarray of shape (..., 2) containing the X and Y coordinates of the points
+        Return:
+            np.ndarray of shape (...) containing the interpolated values
+        """
+
+        # Checking if the points are of type np.ndarray
+        if not isinstance(points, np.ndarray):
+            raise TypeError('Points must be of type np.ndarray')
+
+        # Checking if the points have an X and a Y coordinate
+        if points.ndim < 1 or points.shape[-1] != 2:
+            raise ValueError('Points must be of shape (..., 2)')
+
+        values = self._interpolator(points.reshape(-1, 2).astype(float, copy=False))
+
+        return np.asarray(values).reshape(points.shape[:-1])
+
+    def grid(self,
+             res: Union[int, float] = 1,
+             extent: List[Union[int, float]] = None,
+             chunk_size: int = 256,
+             out: np.ndarray = None,
+             path: str = None,
+             crs: str = None) -> np.ndarray:
+        """
+        Evaluate the interpolator on a regular grid in chunks of rows, the first row of the grid corresponds to the
+        minimum y value
+        Args:
+            res - int, float of the resolution of the grid in x and y direction
+            extent - list containing the minx, maxx, miny and maxy values of the grid, default are the bounds of
+            the data points
+            chunk_size - int of the number of rows of the grid evaluated at once
+            out - np.ndarray or np.memmap of the shape of the grid the raster is written to
+            path - string of the path of a GeoTIFF the raster is written to instead of returning it
+            crs - string of the CRS of the GeoTIFF, default is the CRS of the interpolator
+        Return:
+            np.array as interpolated raster/digital elevation model, None if a path is provided
+        """
+
+        # Checking if resolution is of type int or float
+        if not isinstance(res, (int, float)):
+            raise TypeError('resolution must be of type int or float')
+
+        # Using the bounds of the data points as default extent
+        if extent is None:
+            extent = self.bounds
+
+        # Checking if the extent is of type list
+        if not isinstance(extent, list):
+            raise TypeError('Extent must be of type list')
+
+        # Checking that all values are either ints or floats
+        if not all(isinstance(n, (int, float)) for n in extent):
+            raise TypeError('Bounds values must be of type int or float')
+
+        # Checking if the chunk size is of type int
+        if not isinstance(chunk_size, int):
+            raise TypeError('Chunk size must be of type int')
+
+        # Checking that the chunk size is positive
+        if chunk_size < 1:
+            raise ValueError('Chunk size must be larger than 0')
+
+        # Creating the coordinates of the grid
+        x = np.arange(extent[0], extent[1], res)
+        y = np.arange(extent[2], extent[3], res)
+
+        # Checking if the output array is of type np.ndarray
+        if not isinstance(out, (np.ndarray, type(None))):
+            raise TypeError('Output array must be of type np.ndarray')
+
+        # Checking if the output array has the shape of the grid
+        if out is not None and out.shape != (len(y), len(x)):
+            raise ValueError('Output array must be of shape %s' % str((len(y), len(x))))
+
+        # Checking if the path is of type string
+        if not isinstance(path, (str, type(None))):
+            raise TypeError('Path must be of type string')
+
+        if path is not None:
+            # Writing the chunks directly to the GeoTIFF, the rows are flipped as in raster.save_as_tiff
+            with rasterio.open(path,
+                               'w',
+                               driver='GTiff',
+                               height=len(y),
+                               width=len(x),
+                               count=1,
+                               dtype='float64',
+                               crs=self.crs if crs is None else crs,
+                               transform=rasterio.transform.from_bounds(x[0], y[0], x[0] + len(x) * res,
+                                                                        y[0] + len(y) * res, len(x), len(y))
+                               ) as dst:
+                for start, chunk in _evaluate_grid(self._interpolator, x, y, chunk_size):
+                    window = Window(0, len(y) - start - len(chunk), len(x), len(chunk))
+                    dst.write(np.flipud(chunk), 1, window=window)
+            return None
+
+        array = np.empty((len(y), len(x))) if out is None else out
+        for start, chunk in _evaluate_grid(self._interpolator, x, y, chunk_size):
+            array[start:start + len(chunk)] = chunk
+
+        return array
+
+
+def _create_interpolator(points: np.ndarray, values: np.ndarray, method: str, **kwargs):
+    """
+    Create an interpolator that can be evaluated on arbitrary locations
+    Args:
+        points - np.ndarray of shape (n, 2) containing the coordinates of the data points
+        values - np.ndarray of shape (n,) containing the values of the data points
+        method - string of the interpolation method (nearest, linear, cubic, rbf, idw, local_rbf)
+    Kwargs:
+        see interpolate_raster
+    Return:
+        function taking a np.ndarray of shape (m, 2) and returning the interpolated values of shape (m,)
+    """
+
+    if method == 'nearest':
+        return NearestNDInterpolator(points, values)
+    elif method in ['linear', 'cubic']:
+        # Triangulating the points once, the same triangulation as used by griddata
+        tri = Delaunay(points)
+        if method == 'linear':
+            return LinearNDInterpolator(tri, values)
+        return CloughTocher2DInterpolator(tri, values)
+    elif method == 'rbf':
+        function = kwargs.get('function', 'multiquadric')
+        epsilon = kwargs.get('epsilon', 2)
+        rbf = Rbf(points[:, 0], points[:, 1], values, function=function, epsilon=epsilon)
+        return lambda xi: rbf(xi[:, 0], xi[:, 1])
+    elif method == 'idw':
+        neighbors = kwargs.get('neighbors', 16)
+        power = kwargs.get('power', 2)
+
+        # Checking if the number of neighbors is of type int
+        if not isinstance(neighbors, int):
+            raise TypeError('Number of neighbors must be of type int')
+
+        # Checking that the number of neighbors is positive
+        if neighbors < 1:
+            raise ValueError('Number of neighbors must be larger than 0')
+
+        # Checking if the power is of type int or float
+        if not isinstance(power, (int, float)):
+            raise TypeError('Power must be of type int or float')
+
+        tree = cKDTree(points)
+        return lambda xi: _interpolate_idw(tree, values, xi, min(neighbors, len(points)), power)
+    elif method == 'local_rbf':
+        neighbors = kwargs.get('neighbors', 16)
+
+        # Checking if the number of neighbors is of type int
+        if not isinstance(neighbors, int):
+            raise TypeError('Number of neighbors must be of type int')
+
+        # Removing duplicated vertices, e.g. of closed contour lines, which would make the systems singular
+        points, index = np.unique(points, axis=0, return_index=True)
+
+        # Solving one small system per neighbourhood instead of a global system
+        return RBFInterpolator(points,
+                               values[index],
+                               neighbors=min(neighbors, len(points)),
+                               kernel=kwargs.get('kernel', 'thin_plate_spline'),
+                               epsilon=kwargs.get('epsilon', 1))
+    else:
+        raise ValueError('No valid method defined')
+
+
+def _evaluate_grid(interpolator, x: np.ndarray, y: np.ndarray, chunk_size: int):
+    """
+    Evaluate an interpolator on a grid in chunks of rows so that only one chunk is kept in memory
+    Args:
+        interpolator - function taking a np.ndarray of shape (m, 2) and returning values of shape (m,)
+        x - np.ndarray containing the x coordinates of the columns of the grid
+        y - np.ndarray containing the y coordinates of the rows of the grid
+        chunk_size - int of the number of rows evaluated at once
+    Return:
+        start - int of the index of the first row of the chunk
+        chunk - np.ndarray of shape (rows, len(x)) containing the interpolated values of the chunk
+    """
+
+    for start in range(0, len(y), chunk_size):
+        xx, yy = np.meshgrid(x, y[start:start + chunk_size])
+        chunk = interpolator(np.column_stack([xx.ravel(), yy.ravel()]))
+        yield start, np.asarray(chunk).reshape(xx.shape)
+
+
+def _interpolate_idw(tree: cKDTree,
+                     values: np.ndarray,
+                     xi: np.ndarray,
+                     neighbors: int = 16,
+                     power: Union[int, float] = 2) -> np.ndarray:
+    """
+    Interpolate values using inverse distance weighting of the nearest neighbours found with a KD-tree
+    Args:
+        tree - cKDTree built from the coordinates of the data points
+        values - np.ndarray of shape (n,) containing the values of the data points
+        xi - np.ndarray of shape (m, 2) containing the coordinates where the values are interpolated
+        neighbors - int of the number of nearest neighbours used for each interpolated value
+        power - int, float of the power of the inverse distance weights
+    Return:
+        np.ndarray of shape (m,) containing the interpolated values
+    """
+
+    # Querying the nearest neighbours of all locations
+    distances, indices = tree.query(xi, k=neighbors)
+
+    # Adding an axis if only one neighbour was queried
+    if distances.ndim == 1:
+        distances = distances[:, np.newaxis]
+        indices = indices[:, np.newaxis]
+
+    # Calculating the weights, locations coinciding with a data point take its value
+    with np.errstate(divide='ignore'):
+        weights = 1 / distances ** power
+    exact = np.isinf(weights)
+    weights = np.where(exact.any(axis=1, keepdims=True), exact, weights)
+
+    return np.einsum('ij,ij->i', weights, values[indices]) / weights.sum(axis=1)
+
+
 # Function tested
 def clip_by_extent(gdf: gpd.geodataframe.GeoDataFrame,
                    bbox: List[Union[int, float]],
-                   inplace: bool = False) -> gpd.geodataframe.GeoDataFrame:
+                   inplace: bool = False,
+                   **kwargs) -> gpd.geodataframe.GeoDataFrame:
     """
     Clipping vector data by extent
     Args:
         gdf: GeoDataFrame to be clipped
         bbox: list of bounds for the gdf to be clipped
         inplace: - bool - default False -> copy of the current gdf is created
+    Kwargs:
+        filter_vertices: bool - default False -> if True, the vertices are filtered instead of clipping the geometries
     Return:
         gdf: GeoDataFrame with the clipped values
     """
@@ -363,16 +688,8 @@ def clip_by_extent(gdf: gpd.geodataframe.GeoDataFrame,
     else:
         minx, maxx, miny, maxy = bbox
 
-    # Create deep copy of gdf
-    if not inplace:
-        gdf = gdf.copy(deep=True)
-
-    # Adding XY values to gdf if they are not present yet
-    if np.logical_not(pd.Series(['X', 'Y']).isin(gdf.columns).all()):
-        gdf = extract_xy(gdf)
-
     # Clipping the GeoDataFrame
-    gdf = gdf[(gdf.X >= minx) & (gdf.X <= maxx) & (gdf.Y >= miny) & (gdf.Y <= maxy)]
+    gdf = _clip_by_polygon(gdf, shapely.box(minx, miny, maxx, maxy), kwargs.get('filter_vertices', False))
 
     return gdf
 
@@ -380,13 +697,17 @@ def clip_by_extent(gdf: gpd.geodataframe.GeoDataFrame,
 # Function tested
 def clip_by_shape(gdf: gpd.geodataframe.GeoDataFrame,
                   shape: gpd.geodataframe.GeoDataFrame,
-                  inplace: bool = False) -> gpd.geodataframe.GeoDataFrame:
+                  inplace: bool = False,
+                  **kwargs) -> gpd.geodataframe.GeoDataFrame:
     """
-        Clipping vector data by extent
+        Clipping vector data by shape
         Args:
             gdf: GeoDataFrame to be clipped
-            shape: GeoDataFrame acting as bbox
+            shape: GeoDataFrame containing the polygons the gdf is clipped with
             inplace: - bool - default False -> copy of the current gdf is created
+        Kwargs:
+            filter_vertices: bool - default False -> if True, the vertices are filtered instead of clipping the
+            geometries
         Return:
             gdf: GeoDataFrame with the clipped values
         """
@@ -403,14 +724,265 @@ def clip_by_shape(gdf: gpd.geodataframe.GeoDataFrame,
     if not isinstance(inplace, bool):
         raise TypeError('Inplace must be of type bool')
 
-    # Create deep copy of gdf
-    if not inplace:
-        gdf = gdf.copy(deep=True)
+    # Converting the shape to the CRS of the gdf
+    if shape.crs is not None and gdf.crs is not None and shape.crs != gdf.crs:
+        shape = shape.to_crs(gdf.crs)
 
-    # Setting the extent
-    extent = set_extent(gdf=shape)
+    # Clipping the gdf with the union of the polygons
+    gdf = _clip_by_polygon(gdf, shapely.union_all(shape.geometry.values), kwargs.get('filter_vertices', False))
 
-    # Clipping the gdf
-    gdf = clip_by_extent(gdf, extent, inplace=inplace)
+    return gdf
+
+
+def _clip_by_polygon(gdf: gpd.geodataframe.GeoDataFrame,
+                     polygon: shapely.geometry.base.BaseGeometry,
+                     filter_vertices: bool = False,
+                     candidates: np.ndarray = None) -> gpd.geodataframe.GeoDataFrame:
+    """
+    Clipping vector data by a polygon, the candidate features are preselected with the spatial index of the gdf
+    Args:
+        gdf: GeoDataFrame to be clipped
+        polygon: shapely polygon the gdf is clipped with
+        filter_vertices: bool - default False -> if True, the vertices are filtered instead of clipping the geometries
+        candidates: np.ndarray - default None -> positions of the features intersecting the polygon if they were
+        already queried
+    Return:
+        gdf: GeoDataFrame with the clipped values, X and Y columns are added for the vertices of point and line
+        layers and for the filtered vertices of all layers
+    """
+
+    # Checking if filter_vertices is of type bool
+    if not isinstance(filter_vertices, bool):
+        raise TypeError('filter_vertices must be of type bool')
+
+    # Filtering the existing XY values, the geometries may be parents of the vertices
+    if pd.Series(['X', 'Y']).isin(gdf.columns).all():
+        return gdf[shapely.intersects_xy(polygon, gdf['X'].to_numpy(), gdf['Y'].to_numpy())]
+
+    # Preselecting the features intersecting the polygon with the spatial index, keeping the order of the gdf
+    if candidates is None:
+        candidates = gdf.sindex.query(polygon, predicate='intersects')
+    candidates = np.sort(candidates)
+    gdf = gdf.iloc[candidates].copy()
+
+    if filter_vertices:
+        # Filtering the vertices of the candidate features of any geometry type using the vertex table
+        vertices = extract_xy(gdf, vertex_table=True)
+        parents = np.repeat(np.arange(len(gdf)), shapely.get_num_coordinates(gdf.geometry.values))
+        inside = shapely.intersects_xy(polygon, vertices['X'].to_numpy(), vertices['Y'].to_numpy())
+
+        # Creating the rows of the vertices from their parent features
+        gdf = gdf.iloc[parents[inside]].copy()
+        for column in ['X', 'Y', 'Z']:
+            if column in vertices:
+                gdf[column] = vertices[column].to_numpy()[inside]
+    else:
+        # Clipping the geometries that are not within the polygon
+        geometries = gdf.geometry.values
+        within = shapely.within(geometries, polygon)
+        clipped = geometries.copy()
+        clipped[~within] = _keep_geometry_type(shapely.intersection(geometries[~within], polygon),
+                                               geometries[~within])
+        gdf[gdf.geometry.name] = clipped
+        gdf = gdf[~gdf.geometry.is_empty]
+
+        # Adding XY values of the clipped geometries
+        gdf = extract_xy(gdf)
 
     return gdf
+
+
+def _keep_geometry_type(clipped: np.ndarray, geometries: np.ndarray) -> np.ndarray:
+    """
+    Keeping only the parts of clipped geometries that are of the same dimension as the original geometries, e.g.
+    points created where a line only touches the clipping polygon are removed
+    Args:
+        clipped: np.ndarray containing the clipped shapely geometries
+        geometries: np.ndarray containing the original shapely geometries
+    Return:
+        clipped: np.ndarray containing the clipped geometries, geometries without matching parts are empty
+    """
+
+    # Dimension of the shapely geometry type ids, geometry collections have no dimension
+    dimensions = np.array([0, 1, 1, 2, 0, 1, 2, -1])
+    builders = {0: shapely.multipoints, 1: shapely.multilinestrings, 2: shapely.multipolygons}
+
+    dimension = dimensions[shapely.get_type_id(geometries)]
+    clipped = clipped.copy()
+
+    for i in np.flatnonzero((dimensions[shapely.get_type_id(clipped)] != dimension) & ~shapely.is_empty(clipped)):
+        parts = shapely.get_parts(clipped[i])
+        parts = list(parts[dimensions[shapely.get_type_id(parts)] == dimension[i]])
+
+        if len(parts) == 0:
+            clipped[i] = shapely.from_wkt('GEOMETRYCOLLECTION EMPTY')
+        elif len(parts) == 1:
+            clipped[i] = parts[0]
+        else:
+            clipped[i] = builders[dimension[i]](parts)
+
+    return clipped
+
+
+# Class tested
+class IndexedLayer(object):
+    """
+    This class creates an object wrapping a GeoDataFrame together with a spatial index of its features and a table of
+    its vertices sorted by their X coordinates. Both are built once so that the same layer can be clipped to many
+    extents or shapes without scanning all features or vertices again. The object can be saved to and loaded from disk
+
+    The following attributes are available:
+    - gdf: GeoDataFrame - the GeoDataFrame containing the features of the layer
+    - tree: shapely.STRtree - the spatial index of the geometries of the layer
+    - vertices: pd DataFrame - DataFrame containing X, Y (and Z) coordinates, the parent index and the attributes of
+    each vertex as returned by extract_xy(gdf, vertex_table=True), or the rows of the gdf if it already contains X
+    and Y columns
+    """
+
+    def __init__(self, gdf: gpd.geodataframe.GeoDataFrame):
+        """
+        Args:
+            gdf: GeoDataFrame to be indexed
+        """
+
+        # Checking if the gdf is of type GeoDataFrame
+        if not isinstance(gdf, gpd.geodataframe.GeoDataFrame):
+            raise TypeError('gdf must be of type GeoDataFrame')
+
+        self.gdf = gdf
+        self.tree = shapely.STRtree(gdf.geometry.values)
+
+        # Using the existing XY values as vertices, the geometries may be parents of the vertices
+        if pd.Series(['X', 'Y']).isin(gdf.columns).all():
+            self.vertices = pd.DataFrame(gdf.drop(columns=gdf.geometry.name)).reset_index(drop=True)
+            self.vertices['parent'] = gdf.index.to_numpy()
+            self._parents = np.arange(len(gdf))
+        else:
+            self.vertices = extract_xy(gdf, vertex_table=True)
+            self._parents = np.repeat(np.arange(len(gdf)), shapely.get_num_coordinates(gdf.geometry.values))
+
+        # Sorting the vertices by their X coordinates
+        self._order = np.argsort(self.vertices['X'].to_numpy(), kind='stable')
+        self._x_sorted = self.vertices['X'].to_numpy()[self._order]
+
+    def clip_by_extent(self, bbox: List[Union[int, float]], **kwargs) -> gpd.geodataframe.GeoDataFrame:
+        """
+        Clipping the layer by extent
+        Args:
+            bbox: list of bounds for the layer to be clipped
+        Kwargs:
+            filter_vertices: bool - default False -> if True, the vertices are filtered instead of clipping the
+            geometries
+        Return:
+            gdf: GeoDataFrame with the clipped values
+        """
+
+        # Checking that the bbox is of type list
+        if not isinstance(bbox, list):
+            raise TypeError('Extent must be of type list')
+
+        # Checking that all values are either ints or floats
+        if not all(isinstance(n, (int, float)) for n in bbox):
+            raise TypeError('Bounds values must be of type int or float')
+
+        minx, maxx, miny, maxy = bbox[0:4]
+
+        return self._clip(shapely.box(minx, miny, maxx, maxy), kwargs.get('filter_vertices', False))
+
+    def clip_by_shape(self, shape: gpd.geodataframe.GeoDataFrame, **kwargs) -> gpd.geodataframe.GeoDataFrame:
+        """
+        Clipping the layer by shape
+        Args:
+            shape: GeoDataFrame containing the polygons the layer is clipped with
+        Kwargs:
+            filter_vertices: bool - default False -> if True, the vertices are filtered instead of clipping the
+            geometries
+        Return:
+            gdf: GeoDataFrame with the clipped values
+        """
+
+        # Checking if the shape is of type GeoDataFrame
+        if not isinstance(shape, gpd.geodataframe.GeoDataFrame):
+            raise TypeError('shape must be of type GeoDataFrame')
+
+        # Converting the shape to the CRS of the layer
+        if shape.crs is not None and self.gdf.crs is not None and shape.crs != self.gdf.crs:
+            shape = shape.to_crs(self.gdf.crs)
+
+        return self._clip(shapely.union_all(shape.geometry.values), kwargs.get('filter_vertices', False))
+
+    def _clip(self, polygon: shapely.geometry.base.BaseGeometry, filter_vertices: bool):
+        """
+        Clipping the layer by a polygon
+        Args:
+            polygon: shapely polygon the layer is clipped with
+            filter_vertices: bool if the vertices are filtered instead of clipping the geometries
+        Return:
+            gdf: GeoDataFrame with the clipped values
+        """
+
+        # Checking if filter_vertices is of type bool
+        if not isinstance(filter_vertices, bool):
+            raise TypeError('filter_vertices must be of type bool')
+
+        # Clipping the geometries of the features found in the spatial index
+        if not filter_vertices:
+            return _clip_by_polygon(self.gdf,
+                                    polygon,
+                                    candidates=self.tree.query(polygon, predicate='intersects'))
+
+        # Selecting the vertices within the X range of the polygon by binary search
+        minx, miny, maxx, maxy = polygon.bounds
+        start = np.searchsorted(self._x_sorted, minx, side='left')
+        stop = np.searchsorted(self._x_sorted, maxx, side='right')
+        index = np.sort(self._order[start:stop])
+
+        # Filtering the vertices within the polygon
+        x = self.vertices['X'].to_numpy()[index]
+        y = self.vertices['Y'].to_numpy()[index]
+        index = index[shapely.intersects_xy(polygon, x, y)]
+
+        # Creating the rows of the vertices from their parent features
+        gdf = self.gdf.iloc[self._parents[index]].copy()
+        for column in ['X', 'Y', 'Z']:
+            if column in self.vertices:
+                gdf[column] = self.vertices[column].to_numpy()[index]
+
+        return gdf
+
+    def save(self, path: str):
+        """
+        Saving the layer including its spatial index to disk
+        Args:
+            path: string with the path of the file
+        """
+
+        # Checking if path is of type string
+        if not isinstance(path, str):
+            raise TypeError('Path must be of type string')
+
+        with open(path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: str):
+        """
+        Loading a layer saved with IndexedLayer.save
+        Args:
+            path: string with the path of the file
+        Return:
+            IndexedLayer loaded from the file
+        """
+
+        # Checking if path is of type string
+        if not isinstance(path, str):
+            raise TypeError('Path must be of type string')
+
+        with open(path, 'rb') as file:
+            layer = pickle.load(file)
+
+        # Checking if the file contains an IndexedLayer
+        if not isinstance(layer, IndexedLayer):
+            raise TypeError('File does not contain an IndexedLayer')
+
+        return layer
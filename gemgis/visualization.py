@@ -135,7 +135,7 @@ def plot_dem_3d(dem: Union[rasterio.io.DatasetReader, np.ndarray],
 
     # Rescale array if array is not of type None
     if array is not None:
-        dem = resize_by_array(array, dem.read(1))
+        dem = resize_by_array(array, dem)
         dem = np.flipud(dem)
 
     # Convert rasterio object to array
@@ -3577,6 +3577,1272 @@ def test_plot_orientations():
     plot_orientations(gdf)
 
 
+# Testing sample_points
+###########################################################
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_points(dem):
+    from gemgis.raster import sample, sample_points
+
+    array = dem.read(1)
+    extent = [0, 972, 0, 1069]
+    points = [[500, 500], [600.5, 700.25], [0, 0], [971.9, 1068.9]]
+
+    samples = sample_points(array, extent, points)
+
+    assert isinstance(samples, np.ndarray)
+    assert samples.shape == (4,)
+    for i in range(3):
+        assert samples[i] == sample(array, extent, points[i])
+    assert np.array_equal(sample_points(dem, extent, np.array(points)), samples)
+    assert np.array_equal(sample_points(array, extent, [500, 500]), samples[:1])
+
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_points_error(dem):
+    from gemgis.raster import sample_points
+
+    array = dem.read(1)
+    with pytest.raises(TypeError):
+        sample_points(list(array), [0, 972, 0, 1069], [[500, 500]])
+    with pytest.raises(TypeError):
+        sample_points(array, (0, 972, 0, 1069), [[500, 500]])
+    with pytest.raises(ValueError):
+        sample_points(array, [0, 972, 0], [[500, 500]])
+    with pytest.raises(TypeError):
+        sample_points(array, [0, 972, 0, 1069], ((500, 500), (600, 600)))
+    with pytest.raises(TypeError):
+        sample_points(array, [0, 972, 0, 1069], [[500, '500']])
+    with pytest.raises(ValueError):
+        sample_points(array, [0, 972, 0, 1069], [[500, 500, 500]])
+    with pytest.raises(ValueError):
+        sample_points(array, [0, 972, 0, 1069], [[500, 500], [5000, 500]])
+
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_points_interpolation(dem):
+    from gemgis.raster import sample_points, sample_blockwise
+
+    # Linear ramp along the x-axis with the values located at the cell centers that is reproduced exactly by
+    # bilinear and bicubic interpolation
+    array = np.tile(np.arange(100, dtype=float) + 0.5, (50, 1))
+    extent = [0, 100, 0, 50]
+    points = np.array([[10.25, 20.5], [50.5, 5], [70.75, 49.9]])
+
+    assert np.allclose(sample_points(array, extent, points, interpolation='nearest'), [10.5, 50.5, 71.5])
+    assert np.allclose(sample_points(array, extent, points, interpolation='bilinear'), [10.25, 50.5, 70.75])
+    assert np.allclose(sample_points(array, extent, points, interpolation='bicubic'), [10.25, 50.5, 70.75])
+
+    # Positions between the border and the outermost cell centers are clamped to the border cells
+    assert np.allclose(sample_points(array, extent, [[0.1, 1], [99.9, 1]], interpolation='bilinear'), [0.5, 99.5])
+
+    samples = sample_points(dem, [0, 972, 0, 1069], [[500, 500], [600, 600]], interpolation='bicubic')
+    assert samples.shape == (2,)
+    assert np.all(np.isfinite(samples))
+
+    # Sampling an array gives the same values as sampling the rasterio object blockwise
+    points = np.array([[100.3, 200.7], [500, 500], [851.2, 1001.9]])
+    extent = [dem.bounds.left, dem.bounds.right, dem.bounds.bottom, dem.bounds.top]
+    for interpolation in ['bilinear', 'bicubic']:
+        assert np.allclose(sample_points(dem.read(1), extent, points, interpolation=interpolation),
+                           sample_blockwise(dem, points, interpolation=interpolation))
+
+    with pytest.raises(TypeError):
+        sample_points(array, extent, points, interpolation=1)
+    with pytest.raises(ValueError):
+        sample_points(array, extent, points, interpolation='cubic')
+
+
+# Testing sample_blockwise
+###########################################################
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_blockwise(dem):
+    from gemgis.raster import sample_blockwise
+
+    np.random.seed(1)
+    points = np.array([np.random.uniform(dem.bounds.left, dem.bounds.right, 1000),
+                       np.random.uniform(dem.bounds.bottom, dem.bounds.top, 1000)]).T
+
+    samples = sample_blockwise(dem, points)
+
+    assert isinstance(samples, np.ndarray)
+    assert samples.shape == (1000,)
+    assert np.array_equal(samples, np.array([z[0] for z in dem.sample(points)]))
+
+
+def test_sample_blockwise_interpolation(tmp_path):
+    from gemgis.raster import sample_blockwise
+
+    # Plane with 16x16 blocks, bilinear and bicubic interpolation must reproduce it across block borders
+    array = np.add.outer(np.arange(100) * -2.0, np.arange(80) * 3.0).astype(np.float32)
+    transform = rasterio.transform.from_origin(0, 100, 1, 1)
+    with rasterio.open(tmp_path / 'plane.tif', 'w', driver='GTiff', height=100, width=80, count=1,
+                       dtype=array.dtype, transform=transform, tiled=True, blockxsize=16, blockysize=16) as dst:
+        dst.write(array, 1)
+
+    with rasterio.open(tmp_path / 'plane.tif') as dem:
+        points = np.array([[15.9, 84.1], [16.1, 52.0], [47.5, 32.5], [60.2, 80.0]])
+        expected = -2.0 * (100 - points[:, 1] - 0.5) + 3.0 * (points[:, 0] - 0.5)
+
+        assert np.allclose(sample_blockwise(dem, points, interpolation='bilinear'), expected)
+        assert np.allclose(sample_blockwise(dem, points, interpolation='bicubic'), expected)
+
+        with pytest.raises(ValueError):
+            sample_blockwise(dem, [[90, 50]])
+        with pytest.raises(ValueError):
+            sample_blockwise(dem, points, interpolation='linear')
+        with pytest.raises(TypeError):
+            sample_blockwise(dem.read(1), points)
+
+
+# Testing calculate_terrain_derivatives
+###########################################################
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_calculate_terrain_derivatives(dem):
+    from gemgis.raster import calculate_terrain_derivatives, calculate_slope, calculate_aspect, calculate_hillshades
+
+    derivatives = calculate_terrain_derivatives(dem)
+
+    assert isinstance(derivatives, dict)
+    assert list(derivatives.keys()) == ['slope', 'aspect', 'hillshade']
+    assert np.array_equal(derivatives['slope'], calculate_slope(dem))
+    assert np.array_equal(derivatives['aspect'], calculate_aspect(dem))
+    assert np.array_equal(derivatives['hillshade'], calculate_hillshades(dem))
+
+    array = dem.read(1).astype(float)
+    derivatives = calculate_terrain_derivatives(array, [0, 972, 0, 1069], ['slope', 'aspect'])
+    assert np.array_equal(derivatives['slope'], calculate_slope(array, [0, 972, 0, 1069]))
+    assert np.array_equal(derivatives['aspect'], calculate_aspect(array, [0, 972, 0, 1069]))
+
+    derivatives = calculate_terrain_derivatives(array, [0, 972, 0, 1069], ['slope'], dtype='float32')
+    assert derivatives['slope'].dtype == np.float32
+    assert derivatives['slope'].shape == (275, 250)
+
+
+def test_calculate_terrain_derivatives_curvature():
+    from gemgis.raster import calculate_terrain_derivatives
+
+    # Paraboloid z = x^2 + y^2 with a constant laplacian of 4
+    x, y = np.meshgrid(np.arange(50.), np.arange(40.))
+    curvature = calculate_terrain_derivatives(x ** 2 + y ** 2, [0, 50, 0, 40], ['curvature'])['curvature']
+
+    assert curvature.shape == (40, 50)
+    assert np.allclose(curvature[2:-2, 2:-2], 4)
+
+    with pytest.raises(TypeError):
+        calculate_terrain_derivatives([x], [0, 50, 0, 40])
+    with pytest.raises(TypeError):
+        calculate_terrain_derivatives(x, (0, 50, 0, 40))
+    with pytest.raises(ValueError):
+        calculate_terrain_derivatives(x)
+    with pytest.raises(ValueError):
+        calculate_terrain_derivatives(x, [0, 50, 0, 40], ['roughness'])
+    with pytest.raises(TypeError):
+        calculate_terrain_derivatives(x, [0, 50, 0, 40], 'slope')
+    with pytest.raises(ValueError):
+        calculate_terrain_derivatives(x, [0, 50, 0, 40], altdeg=100)
+
+
+# Testing calculate_terrain_derivatives_tiled
+###########################################################
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_calculate_terrain_derivatives_tiled(dem, tmp_path):
+    from gemgis.raster import calculate_terrain_derivatives_tiled, calculate_terrain_derivatives
+
+    derivatives = ['slope', 'aspect', 'hillshade', 'curvature']
+    calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'terrain.tif'), derivatives, tile_size=64,
+                                        dtype='float64')
+
+    expected = calculate_terrain_derivatives(dem, derivatives=derivatives)
+
+    with rasterio.open(tmp_path / 'terrain.tif') as terrain:
+        assert terrain.count == 4
+        assert terrain.shape == (275, 250)
+        assert terrain.transform == dem.transform
+        assert list(terrain.descriptions) == derivatives
+        for i, derivative in enumerate(derivatives):
+            assert np.allclose(terrain.read(i + 1), expected[derivative])
+
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_calculate_terrain_derivatives_tiled_error(dem, tmp_path):
+    from gemgis.raster import calculate_terrain_derivatives_tiled
+
+    with pytest.raises(TypeError):
+        calculate_terrain_derivatives_tiled(dem.read(1), str(tmp_path / 'terrain.tif'))
+    with pytest.raises(TypeError):
+        calculate_terrain_derivatives_tiled(dem, ['terrain.tif'])
+    with pytest.raises(ValueError):
+        calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'terrain.tif'), ['roughness'])
+    with pytest.raises(TypeError):
+        calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'terrain.tif'), tile_size=64.0)
+
+
+# Testing parallel tiled processing
+###########################################################
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_calculate_terrain_derivatives_tiled_workers(dem, tmp_path):
+    from gemgis.raster import calculate_terrain_derivatives_tiled
+
+    calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'serial.tif'), tile_size=64)
+    calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'thread.tif'), tile_size=64, workers=4)
+    calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'process.tif'), tile_size=64, workers=2,
+                                        executor='process')
+
+    with rasterio.open(tmp_path / 'serial.tif') as serial, rasterio.open(tmp_path / 'thread.tif') as thread, \
+            rasterio.open(tmp_path / 'process.tif') as process:
+        assert np.array_equal(serial.read(), thread.read())
+        assert np.array_equal(serial.read(), process.read())
+
+    with pytest.raises(ValueError):
+        calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'terrain.tif'), workers=0)
+    with pytest.raises(ValueError):
+        calculate_terrain_derivatives_tiled(dem, str(tmp_path / 'terrain.tif'), executor='gpu')
+
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_calculate_difference_tiled(dem, tmp_path):
+    from gemgis.raster import calculate_difference_tiled
+
+    with rasterio.open(tmp_path / 'shifted.tif', 'w', driver='GTiff', height=dem.height, width=dem.width, count=1,
+                       dtype=dem.dtypes[0], crs=dem.crs, transform=dem.transform) as dst:
+        dst.write(dem.read(1) - 100, 1)
+
+    with rasterio.open(tmp_path / 'shifted.tif') as shifted:
+        calculate_difference_tiled(dem, shifted, str(tmp_path / 'diff.tif'), tile_size=64, workers=3)
+
+    with rasterio.open(tmp_path / 'diff.tif') as diff:
+        assert diff.shape == dem.shape
+        assert np.allclose(diff.read(1), 100)
+
+    with pytest.raises(TypeError):
+        calculate_difference_tiled(dem.read(1), dem, str(tmp_path / 'diff.tif'))
+
+
+def test_calculate_difference_tiled_unsigned(tmp_path):
+    from gemgis.raster import calculate_difference_tiled
+
+    # Creating two unsigned integer rasters where the difference is negative
+    transform = rasterio.transform.from_origin(0, 100, 1, 1)
+    for name, value in [('raster1.tif', 100), ('raster2.tif', 150)]:
+        with rasterio.open(tmp_path / name, 'w', driver='GTiff', height=100, width=100, count=1, dtype='uint16',
+                           crs='EPSG:25832', transform=transform) as dst:
+            dst.write(np.full((100, 100), value, dtype=np.uint16), 1)
+
+    with rasterio.open(tmp_path / 'raster1.tif') as raster1, rasterio.open(tmp_path / 'raster2.tif') as raster2:
+        calculate_difference_tiled(raster1, raster2, str(tmp_path / 'diff.tif'), tile_size=32)
+
+    with rasterio.open(tmp_path / 'diff.tif') as diff:
+        assert diff.dtypes[0] == 'float32'
+        assert np.all(diff.read(1) == -50)
+
+
+def test_calculate_difference_tiled_unsigned_reprojected(tmp_path):
+    from gemgis.raster import calculate_difference_tiled
+    from rasterio.warp import transform_bounds
+
+    # Creating an unsigned integer raster and a raster in geographic coordinates without nodata value
+    transform = rasterio.transform.from_origin(500000, 5602000, 10, 10)
+    with rasterio.open(tmp_path / 'raster1.tif', 'w', driver='GTiff', height=200, width=200, count=1,
+                       dtype='uint16', crs='EPSG:25832', transform=transform) as dst:
+        dst.write(np.full((200, 200), 100, dtype=np.uint16), 1)
+
+    west, south, east, north = transform_bounds('EPSG:25832', 'EPSG:4326', 500500, 5600500, 501500, 5601500)
+    with rasterio.open(tmp_path / 'raster2.tif', 'w', driver='GTiff', height=100, width=100, count=1,
+                       dtype='uint16', crs='EPSG:4326',
+                       transform=rasterio.transform.from_bounds(west, south, east, north, 100, 100)) as dst:
+        dst.write(np.full((100, 100), 150, dtype=np.uint16), 1)
+
+    with rasterio.open(tmp_path / 'raster1.tif') as raster1, rasterio.open(tmp_path / 'raster2.tif') as raster2:
+        calculate_difference_tiled(raster1, raster2, str(tmp_path / 'diff.tif'), tile_size=32)
+
+    # Cells outside of raster2 are nodata instead of differences to the fill value of the reprojection
+    with rasterio.open(tmp_path / 'diff.tif') as diff:
+        array_diff = diff.read(1)
+        assert diff.dtypes[0] == 'float32'
+        assert np.isnan(array_diff).any()
+        assert np.all(array_diff[~np.isnan(array_diff)] == -50)
+
+
+# Testing interpolate_raster with local methods
+###########################################################
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/topo1.shp')
+                         ])
+def test_interpolate_raster_idw(gdf):
+    from gemgis.vector import interpolate_raster
+    from gemgis.vector import extract_xy
+
+    gdf_xyz = extract_xy(gdf, inplace=False)
+    raster = interpolate_raster(gdf_xyz, method='idw', res=10, neighbors=8)
+    raster_nearest = interpolate_raster(gdf_xyz, method='nearest', res=10)
+
+    assert isinstance(raster, np.ndarray)
+    assert raster.shape == raster_nearest.shape
+    assert np.isfinite(raster).all()
+    assert raster.min() >= gdf_xyz['Z'].min() - 1e-6
+    assert raster.max() <= gdf_xyz['Z'].max() + 1e-6
+
+    # One neighbour reproduces nearest neighbour interpolation
+    raster_one = interpolate_raster(gdf_xyz, method='idw', res=10, neighbors=1)
+    assert np.isclose(raster_one, raster_nearest).mean() > 0.99
+
+
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/topo1.shp')
+                         ])
+def test_interpolate_raster_local_rbf(gdf):
+    from gemgis.vector import interpolate_raster
+    from gemgis.vector import extract_xy
+
+    gdf_xyz = extract_xy(gdf, inplace=False)
+    raster = interpolate_raster(gdf_xyz, method='local_rbf', res=10, neighbors=32)
+    raster_linear = interpolate_raster(gdf_xyz, method='linear', res=10)
+
+    assert isinstance(raster, np.ndarray)
+    assert raster.shape == raster_linear.shape
+    assert np.isfinite(raster).all()
+    assert np.nanmean(np.abs(raster - raster_linear)) < 20
+
+    with pytest.raises(TypeError):
+        interpolate_raster(gdf_xyz, method='local_rbf', neighbors=8.0)
+
+
+# Testing chunked evaluation of interpolate_raster
+###########################################################
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/topo1.shp')
+                         ])
+def test_interpolate_raster_chunked(gdf, tmp_path):
+    from gemgis.vector import interpolate_raster
+    from gemgis.vector import extract_xy
+
+    gdf_xyz = extract_xy(gdf, inplace=False)
+    raster = interpolate_raster(gdf_xyz, method='linear', res=10, chunk_size=1000)
+    raster_chunked = interpolate_raster(gdf_xyz, method='linear', res=10, chunk_size=7)
+
+    assert np.allclose(raster, raster_chunked, equal_nan=True)
+
+    out = np.lib.format.open_memmap(str(tmp_path / 'raster.npy'), mode='w+', dtype='float64', shape=raster.shape)
+    raster_out = interpolate_raster(gdf_xyz, method='linear', res=10, chunk_size=7, out=out)
+    assert raster_out is out
+    assert np.allclose(out, raster, equal_nan=True)
+
+    assert interpolate_raster(gdf_xyz, method='linear', res=10, chunk_size=7,
+                              path=str(tmp_path / 'raster.tif')) is None
+    with rasterio.open(tmp_path / 'raster.tif') as dst:
+        assert dst.shape == raster.shape
+        assert dst.res == (10, 10)
+        assert np.allclose(np.flipud(dst.read(1)), raster, equal_nan=True)
+
+    with pytest.raises(ValueError):
+        interpolate_raster(gdf_xyz, method='linear', res=10, out=np.empty((2, 2)))
+    with pytest.raises(TypeError):
+        interpolate_raster(gdf_xyz, method='linear', res=10, chunk_size=7.5)
+
+
+# Testing Interpolator
+###########################################################
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/topo1.shp')
+                         ])
+def test_interpolator(gdf):
+    from gemgis.vector import Interpolator, interpolate_raster
+    from gemgis.vector import extract_xy
+
+    gdf_xyz = extract_xy(gdf, inplace=False)
+    interpolator = Interpolator(gdf_xyz, method='cubic')
+
+    assert interpolator.method == 'cubic'
+    assert interpolator.points.shape == (len(gdf_xyz), 2)
+
+    # Evaluating the same interpolator at several resolutions
+    for res in [5, 10, 20]:
+        assert np.allclose(interpolator.grid(res=res), interpolate_raster(gdf_xyz, method='cubic', res=res),
+                           equal_nan=True)
+
+    # Evaluating a subset of the extent
+    raster = interpolator.grid(res=10, extent=[100, 500, 200, 600])
+    assert raster.shape == (40, 40)
+
+    # Evaluating point batches of arbitrary shape
+    points = np.array([[[250.5, 300.5], [400.0, 500.0]], [[600.0, 700.0], [300.0, 200.0]]])
+    values = interpolator(points)
+    assert values.shape == (2, 2)
+    assert np.isclose(values[0, 0], interpolator(np.array([250.5, 300.5])))
+
+    with pytest.raises(ValueError):
+        interpolator(np.array([[1, 2, 3]]))
+    with pytest.raises(TypeError):
+        interpolator([[250.5, 300.5]])
+    with pytest.raises(ValueError):
+        Interpolator(gdf_xyz, method='kriging')
+
+
+# Testing extract_xy with mixed and 3D geometries
+###########################################################
+def test_extract_xy_mixed_lines():
+    from gemgis.vector import extract_xy
+    from shapely.geometry import LineString, MultiLineString
+
+    gdf = gpd.GeoDataFrame({'formation': ['Sand', 'Clay']},
+                           geometry=[LineString([(0, 0), (1, 1), (2, 1)]),
+                                     MultiLineString([[(5, 5), (6, 6)], [(7, 7), (8, 8)]])],
+                           crs='EPSG:4326')
+    gdf_new = extract_xy(gdf)
+
+    assert all(gdf_new.geom_type == 'LineString')
+    assert gdf_new.crs == gdf.crs
+    assert gdf_new['X'].tolist() == [0, 1, 2, 5, 6, 7, 8]
+    assert gdf_new['Y'].tolist() == [0, 1, 1, 5, 6, 7, 8]
+    assert gdf_new.index.tolist() == [0, 0, 0, 1, 1, 1, 1]
+    assert gdf_new['formation'].tolist() == ['Sand'] * 3 + ['Clay'] * 4
+    assert 'Z' not in gdf_new
+
+
+def test_extract_xy_lines_3d():
+    from gemgis.vector import extract_xy
+    from shapely.geometry import LineString
+
+    gdf = gpd.GeoDataFrame(geometry=[LineString([(0, 0, 10), (1, 1, 20)])], crs='EPSG:4326')
+    gdf_new = extract_xy(gdf)
+
+    assert gdf_new['X'].tolist() == [0, 1]
+    assert gdf_new['Y'].tolist() == [0, 1]
+    assert gdf_new['Z'].tolist() == [10, 20]
+
+
+# Testing extract_xy vertex table
+###########################################################
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/topo1.shp')
+                         ])
+def test_extract_xy_vertex_table(gdf):
+    from gemgis.vector import extract_xy
+
+    gdf_new = extract_xy(gdf)
+    table = extract_xy(gdf, vertex_table=True)
+
+    assert isinstance(table, pd.DataFrame)
+    assert not isinstance(table, gpd.GeoDataFrame)
+    assert 'geometry' not in table
+    assert len(table) == len(gdf_new)
+    assert np.array_equal(table[['X', 'Y', 'Z']].values, gdf_new[['X', 'Y', 'Z']].values)
+    assert np.array_equal(table['parent'].values, gdf_new.index.values)
+
+    points = extract_xy(gdf, vertex_table=True, create_points=True)
+    assert isinstance(points, gpd.GeoDataFrame)
+    assert all(points.geom_type == 'Point')
+    assert points.crs == gdf.crs
+    assert np.array_equal(points.geometry.x.values, table['X'].values)
+
+    with pytest.raises(TypeError):
+        extract_xy(gdf, vertex_table='yes')
+
+
+def test_extract_xy_vertex_table_categories():
+    from gemgis.vector import extract_xy
+    from shapely.geometry import LineString, MultiLineString
+
+    gdf = gpd.GeoDataFrame({'formation': ['Sand', 'Clay'], 'dip': ['10', '20']},
+                           geometry=[LineString([(0, 0, 1), (1, 1, 2)]),
+                                     MultiLineString([[(5, 5, 3), (6, 6, 4)], [(7, 7, 5), (8, 8, 6)]])],
+                           crs='EPSG:4326')
+    table = extract_xy(gdf, vertex_table=True)
+
+    assert table.columns.tolist() == ['X', 'Y', 'Z', 'parent', 'formation', 'dip']
+    assert table['parent'].tolist() == [0, 0, 1, 1, 1, 1]
+    assert table['Z'].tolist() == [1, 2, 3, 4, 5, 6]
+    assert isinstance(table['formation'].dtype, pd.CategoricalDtype)
+    assert table['formation'].tolist() == ['Sand'] * 2 + ['Clay'] * 4
+    assert table['dip'].tolist() == [10.0] * 2 + [20.0] * 4
+
+
+# Testing extract_z with differing CRS
+###########################################################
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/interfaces1_lines.shp')
+                         ])
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_extract_z_transformed(gdf, dem, tmp_path):
+    from gemgis.vector import extract_z, extract_coordinates
+
+    # Placing the DEM and the lines in a projected CRS
+    transform = rasterio.transform.from_origin(500000, 5600000 + dem.bounds.top, dem.res[0], dem.res[1])
+    with rasterio.open(tmp_path / 'dem.tif', 'w', driver='GTiff', height=dem.height, width=dem.width, count=1,
+                       dtype=dem.dtypes[0], crs='EPSG:25832', transform=transform) as dst:
+        dst.write(dem.read(1), 1)
+
+    gdf = gdf.set_crs('EPSG:25832', allow_override=True)
+    gdf = gdf.set_geometry(gdf.geometry.translate(500000, 5600000))
+    gdf_wgs84 = gdf.to_crs('EPSG:4326')
+
+    with rasterio.open(tmp_path / 'dem.tif') as dem_utm:
+        gdf_z = extract_z(gdf, dem_utm)
+        gdf_wgs84_z = extract_z(gdf_wgs84, dem_utm)
+        gdf_coordinates = extract_coordinates(gdf_wgs84, dem_utm)
+
+    assert gdf_wgs84_z.crs == gdf_wgs84.crs
+    assert len(gdf_wgs84_z) == len(gdf_z)
+    assert gdf_wgs84_z['X'].max() < 180
+    assert np.allclose(gdf_wgs84_z['Z'], gdf_z['Z'])
+    assert np.allclose(gdf_coordinates['Z'], gdf_z['Z'])
+    assert gdf_wgs84_z.geometry.geom_equals(gdf_wgs84.geometry.loc[gdf_wgs84_z.index]).all()
+
+
+# Testing get_transformer
+###########################################################
+def test_get_transformer():
+    from gemgis.utils import get_transformer, clear_transformer_cache
+    import pyproj
+
+    transformer = get_transformer('EPSG:4326', 'EPSG:25832')
+    assert isinstance(transformer, pyproj.Transformer)
+    assert get_transformer('EPSG:4326', 'EPSG:25832') is transformer
+
+    # Coordinates are always in x, y order
+    x, y = transformer.transform(9, 50)
+    assert np.isclose(x, 500000, atol=1e3)
+
+    assert get_transformer(rasterio.crs.CRS.from_epsg(4326), rasterio.crs.CRS.from_epsg(25832)) is \
+        get_transformer(rasterio.crs.CRS.from_epsg(4326), rasterio.crs.CRS.from_epsg(25832))
+
+    clear_transformer_cache()
+    assert get_transformer('EPSG:4326', 'EPSG:25832') is not transformer
+
+    with pytest.raises(TypeError):
+        get_transformer(['EPSG:4326'], 'EPSG:25832')
+
+
+def test_get_features_transformed():
+    from gemgis.utils import getFeatures
+
+    features = getFeatures([500000, 501000, 5600000, 5601000], crs_raster='EPSG:4326', crs_bbox='EPSG:25832')
+
+    assert features[0]['type'] == 'Polygon'
+    assert isinstance(features[0]['coordinates'], list)
+    assert np.allclose(np.array(features[0]['coordinates'][0]).min(axis=0), [9, 50.552], atol=1e-3)
+
+
+# Testing clipping of geometries
+###########################################################
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/topo1.shp')
+                         ])
+def test_clip_by_extent_geometries(gdf):
+    from gemgis.vector import clip_by_extent
+
+    gdf_clipped = clip_by_extent(gdf, [100, 600, 100, 600])
+    gdf_vertices = clip_by_extent(gdf, [100, 600, 100, 600], filter_vertices=True)
+
+    assert gdf_clipped['X'].min() >= 100
+    assert gdf_clipped['X'].max() <= 600
+    assert gdf_clipped['Y'].min() >= 100
+    assert gdf_clipped['Y'].max() <= 600
+    assert all(gdf_clipped.total_bounds == [100, 100, 600, 600])
+
+    # Clipping the geometries adds vertices on the boundary of the extent
+    assert len(gdf_clipped) > len(gdf_vertices)
+    assert pd.Series(['X', 'Y']).isin(gdf_vertices.columns).all()
+
+
+def test_clip_by_shape_polygon():
+    from gemgis.vector import clip_by_shape
+    from shapely.geometry import Point, Polygon, LineString
+
+    points = gpd.GeoDataFrame(geometry=[Point(1, 1), Point(8, 1), Point(8, 8), Point(20, 20)], crs='EPSG:4326')
+    lines = gpd.GeoDataFrame(geometry=[LineString([(0, 5), (10, 5)]), LineString([(20, 20), (30, 30)])],
+                             crs='EPSG:4326')
+    triangle = gpd.GeoDataFrame(geometry=[Polygon([(0, 0), (10, 0), (0, 10)])], crs='EPSG:4326')
+
+    points_clipped = clip_by_shape(points, triangle)
+    assert points_clipped.index.tolist() == [0, 1]
+    assert points_clipped['X'].tolist() == [1, 8]
+
+    lines_clipped = clip_by_shape(lines, triangle)
+    assert lines_clipped.index.tolist() == [0, 0]
+    assert lines_clipped['X'].tolist() == [0, 5]
+    assert lines_clipped['Y'].tolist() == [5, 5]
+
+    lines_vertices = clip_by_shape(lines, triangle, filter_vertices=True)
+    assert lines_vertices['X'].tolist() == [0]
+
+
+def test_clip_by_extent_polygon_vertices():
+    from gemgis.vector import clip_by_extent
+    from shapely.geometry import Polygon, MultiPolygon, box
+
+    polygons = gpd.GeoDataFrame({'id': [1, 2]},
+                                geometry=[Polygon([(1, 1), (5, 1), (20, 20)]),
+                                          MultiPolygon([box(2, 2, 3, 3), box(30, 30, 40, 40)])])
+
+    vertices = clip_by_extent(polygons, [0, 10, 0, 10], filter_vertices=True)
+
+    assert vertices.index.tolist() == [0, 0, 0, 1, 1, 1, 1, 1]
+    assert vertices['id'].tolist() == [1, 1, 1, 2, 2, 2, 2, 2]
+    assert (vertices['X'] <= 10).all() and (vertices['Y'] <= 10).all()
+
+    # Clipping the geometries keeps the polygons
+    polygons_clipped = clip_by_extent(polygons, [0, 10, 0, 10])
+    assert all(polygons_clipped.geom_type.isin(['Polygon', 'MultiPolygon']))
+    assert polygons_clipped.total_bounds.tolist() == [1, 1, 10, 10]
+
+
+def test_clip_by_extent_touching_line():
+    from gemgis.vector import clip_by_extent
+    from shapely.geometry import LineString
+
+    # The second line only touches the extent and the third line overlaps its boundary and touches a corner
+    lines = gpd.GeoDataFrame(geometry=[LineString([(0, 5), (20, 5)]),
+                                       LineString([(10, 0), (20, -10)]),
+                                       LineString([(0, 10), (5, 10), (5, 12), (12, 12), (12, 10), (10, 10)])],
+                             crs='EPSG:4326')
+
+    lines_clipped = clip_by_extent(lines, [0, 10, 0, 10])
+
+    assert all(lines_clipped.geom_type.isin(['LineString', 'MultiLineString']))
+    assert lines_clipped.index.unique().tolist() == [0, 2]
+    assert pd.Series(['X', 'Y']).isin(lines_clipped.columns).all()
+    assert lines_clipped['X'].tolist() == [0, 10, 0, 5]
+
+
+# Testing IndexedLayer
+###########################################################
+@pytest.mark.parametrize("gdf",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/topo1.shp')
+                         ])
+@pytest.mark.parametrize("shape",
+                         [
+                             gpd.read_file('../../gemgis/data/Test1/extent1.shp')
+                         ])
+def test_indexed_layer(gdf, shape, tmp_path):
+    from gemgis.vector import IndexedLayer, clip_by_extent, clip_by_shape, extract_xy
+    from shapely.geometry import LineString
+
+    layer = IndexedLayer(gdf)
+
+    for bbox in [[100, 600, 100, 600], [0, 300, 500, 1000], [2000, 3000, 0, 100]]:
+        assert layer.clip_by_extent(bbox).equals(clip_by_extent(gdf, bbox))
+
+        vertices = layer.clip_by_extent(bbox, filter_vertices=True)
+        vertices_expected = clip_by_extent(gdf, bbox, filter_vertices=True)
+        assert vertices.index.tolist() == vertices_expected.index.tolist()
+        assert np.array_equal(vertices[['X', 'Y', 'Z']].values, vertices_expected[['X', 'Y', 'Z']].values)
+
+    assert layer.clip_by_shape(shape).equals(clip_by_shape(gdf, shape))
+
+    layer.save(str(tmp_path / 'layer.pkl'))
+    layer_loaded = IndexedLayer.load(str(tmp_path / 'layer.pkl'))
+    assert layer_loaded.clip_by_extent([100, 600, 100, 600]).equals(layer.clip_by_extent([100, 600, 100, 600]))
+
+    # Layers that already contain XY values are clipped by these values
+    points = extract_xy(gdf)
+    layer_points = IndexedLayer(points)
+    for bbox in [[100, 600, 100, 600], [0, 300, 500, 1000]]:
+        for filter_vertices in [False, True]:
+            vertices = layer_points.clip_by_extent(bbox, filter_vertices=filter_vertices)
+            vertices_expected = clip_by_extent(points, bbox, filter_vertices=filter_vertices)
+            assert vertices.index.tolist() == vertices_expected.index.tolist()
+            assert np.array_equal(vertices[['X', 'Y']].values, vertices_expected[['X', 'Y']].values)
+
+    line = gpd.GeoDataFrame(geometry=[LineString([(1, 1), (5, 5), (20, 20), (30, 30), (40, 40), (50, 50)])])
+    vertices = IndexedLayer(extract_xy(line)).clip_by_extent([0, 10, 0, 10], filter_vertices=True)
+    assert vertices[['X', 'Y']].values.tolist() == [[1, 1], [5, 5]]
+
+    with pytest.raises(TypeError):
+        IndexedLayer([gdf])
+    with pytest.raises(TypeError):
+        layer.clip_by_extent((100, 600, 100, 600))
+
+
+# Testing windowed clip_by_extent
+###########################################################
+@pytest.mark.parametrize("raster",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_clip_by_extent_windowed(raster, tmp_path):
+    from gemgis.raster import clip_by_extent
+
+    array, extent, transform = clip_by_extent(raster, [101.3, 499.2, 203.7, 601.9], windowed=True, save=True,
+                                              path=str(tmp_path / 'clipped.tif'))
+
+    assert isinstance(array, np.ndarray)
+    assert array.shape == (103, 103)
+    assert transform.a == raster.transform.a
+    assert np.isclose(transform.c, 26 * raster.res[0])
+    assert extent[0] <= 101.3 and extent[1] >= 499.2 and extent[2] <= 203.7 and extent[3] >= 601.9
+    assert np.array_equal(array, raster.read(1)[120:223, 26:129])
+
+    with rasterio.open(tmp_path / 'clipped.tif') as clipped:
+        assert clipped.transform == transform
+        assert np.array_equal(clipped.read(1), array)
+
+    # Windowed clips are not saved by default
+    clip_by_extent(raster, [101.3, 499.2, 203.7, 601.9], windowed=True, path=str(tmp_path / 'default.tif'))
+    assert not (tmp_path / 'default.tif').exists()
+
+    # Extents exceeding the raster are limited to the raster
+    array, extent, transform = clip_by_extent(raster, [-100, 500, -100, 2000], windowed=True, save=False)
+    assert array.shape == (275, 129)
+
+    with pytest.raises(ValueError):
+        clip_by_extent(raster, [2000, 3000, 2000, 3000], windowed=True, save=False)
+    with pytest.raises(TypeError):
+        clip_by_extent(raster, [0, 100, 0, 100], windowed='yes', save=False)
+
+
+# Testing windowed clip_by_extent of arrays
+###########################################################
+def test_clip_by_extent_array_windowed(tmp_path):
+    from gemgis.raster import clip_by_extent
+
+    array = np.arange(200, dtype=float).reshape(10, 20)
+
+    clipped, extent, transform = clip_by_extent(array, [25, 75, 12, 48], extent_raster=[0, 200, 0, 50],
+                                                windowed=True, save=False)
+
+    assert np.shares_memory(clipped, array)
+    assert clipped.shape == (8, 6)
+    assert np.array_equal(clipped, array[2:10, 2:8])
+    assert extent == [20, 80, 10, 50]
+    assert transform.a == 10 and transform.e == -5
+    assert transform.c == 20 and transform.f == 50
+
+    # Windowed clips are not saved by default, hence no crs is required
+    default, _, _ = clip_by_extent(array, [25, 75, 12, 48], extent_raster=[0, 200, 0, 50], windowed=True)
+    assert np.array_equal(default, clipped)
+
+    clip_by_extent(array, [25, 75, 12, 48], extent_raster=[0, 200, 0, 50], windowed=True, save=True,
+                   path=str(tmp_path / 'clipped.tif'), crs='EPSG:25832')
+
+    with rasterio.open(tmp_path / 'clipped.tif') as dst:
+        assert dst.crs == 'EPSG:25832'
+        assert dst.transform == transform
+        assert np.array_equal(np.flipud(dst.read(1)), clipped)
+
+    with pytest.raises(ValueError):
+        clip_by_extent(array, [25, 75, 12, 48], extent_raster=[0, 200, 0, 50], windowed=True, save=True)
+    with pytest.raises(ValueError):
+        clip_by_extent(array, [250, 300, 12, 48], extent_raster=[0, 200, 0, 50], windowed=True, save=False)
+
+
+# Testing clip_by_shapes
+###########################################################
+@pytest.mark.parametrize("raster",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_clip_by_shapes(raster, tmp_path):
+    from gemgis.raster import clip_by_shapes
+    from rasterio.mask import mask
+    from shapely.geometry import box, Polygon, mapping
+
+    polygons = [Polygon([(100, 100), (600, 150), (300, 900)]),
+                box(500, 500, 960, 1000),
+                box(10, 10, 140, 140),
+                Polygon([(0, 0), (971, 0), (971, 1068)])]
+    shapes = gpd.GeoDataFrame(geometry=polygons, crs=raster.crs)
+    paths = [str(tmp_path / ('clipped%d.tif' % i)) for i in range(len(polygons))]
+
+    clipped = clip_by_shapes(raster, shapes, paths=paths, workers=2)
+
+    assert len(clipped) == len(polygons)
+    for (array, extent, transform), polygon, path in zip(clipped, polygons, paths):
+        array_expected, transform_expected = mask(raster, [mapping(polygon)], crop=True)
+        assert transform == transform_expected
+        assert np.array_equal(array, array_expected[0])
+        assert extent[0] <= polygon.bounds[0] and extent[1] >= polygon.bounds[2]
+
+        with rasterio.open(path) as dst:
+            assert dst.transform == transform
+            assert np.array_equal(dst.read(1), array)
+
+    # Clipping only to the windows of the polygons
+    array, extent, transform = clip_by_shapes(raster, shapes, masked=False)[0]
+    assert np.array_equal(array, raster.read(1, window=rasterio.windows.from_bounds(
+        *extent[0:4:2], *extent[1:4:2], transform=raster.transform)))
+
+    with pytest.raises(TypeError):
+        clip_by_shapes(raster, polygons)
+    with pytest.raises(ValueError):
+        clip_by_shapes(raster, shapes, paths=paths[:2])
+
+
+def test_clip_by_shapes_striped(tmp_path):
+    from gemgis.raster import clip_by_shapes, _BlockReader
+    from rasterio.windows import Window
+    from rasterio.mask import mask
+    from shapely.geometry import box, mapping
+
+    # Creating a striped raster with one row per strip
+    array = np.arange(1000 * 300, dtype=np.uint32).reshape(1000, 300)
+    with rasterio.open(tmp_path / 'striped.tif', 'w', driver='GTiff', height=1000, width=300, count=1,
+                       dtype='uint32', crs='EPSG:25832', transform=rasterio.transform.from_origin(0, 1000, 1, 1),
+                       blockysize=1) as dst:
+        dst.write(array, 1)
+
+    with rasterio.open(tmp_path / 'striped.tif') as raster:
+        assert raster.block_shapes[0] == (1, 300)
+
+        # Contiguous strips are read at once
+        reader = _BlockReader(raster)
+        calls = []
+        read = raster.read
+        raster.read = lambda *args, **kwargs: calls.append(kwargs['window']) or read(*args, **kwargs)
+        assert np.array_equal(reader.read(Window(0, 0, 300, 1000)), array)
+        assert len(calls) == 4
+        del raster.read
+
+        polygons = [box(10, 10, 200, 600), box(100, 500, 290, 990)]
+        clipped = clip_by_shapes(raster, gpd.GeoDataFrame(geometry=polygons, crs=raster.crs))
+        for (array_clipped, extent, transform), polygon in zip(clipped, polygons):
+            array_expected, transform_expected = mask(raster, [mapping(polygon)], crop=True)
+            assert np.array_equal(array_clipped, array_expected[0])
+
+
+# Testing RasterHandle
+###########################################################
+@pytest.mark.parametrize("raster",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+@pytest.mark.parametrize("memmap", [False, True])
+def test_raster_handle(raster, memmap, tmp_path):
+    import os
+    import gc
+    from gemgis.raster import RasterHandle, calculate_slope, clip_by_extent
+    from gemgis.vector import extract_z
+
+    window = rasterio.windows.Window(3, 4, 10, 20)
+
+    with RasterHandle('../../gemgis/data/Test1/raster1.tif', memmap=memmap) as handle:
+        assert isinstance(handle, rasterio.io.DatasetReader)
+        assert handle.transform == raster.transform
+        assert handle.extent == [raster.bounds.left, raster.bounds.right, raster.bounds.bottom, raster.bounds.top]
+
+        # Reads are served from the same array
+        assert handle.read(1) is handle.array
+        assert not handle.array.flags.writeable
+        assert np.array_equal(handle.read(1), raster.read(1))
+        assert np.array_equal(handle.read(), raster.read())
+        assert np.array_equal(handle.read(1, window=window), raster.read(1, window=window))
+        assert np.shares_memory(handle.read(1, window=window), handle.array)
+        assert np.array_equal(handle.read(1, window=window, masked=True), raster.read(1, window=window, masked=True))
+
+        # The handle is accepted by functions taking rasterio objects
+        assert np.array_equal(calculate_slope(handle), calculate_slope(raster))
+        assert np.array_equal(clip_by_extent(handle, [100, 500, 200, 600], windowed=True, save=False)[0],
+                              clip_by_extent(raster, [100, 500, 200, 600], windowed=True, save=False)[0])
+
+        gdf = gpd.read_file('../../gemgis/data/Test1/interfaces1.shp')
+        assert np.array_equal(extract_z(gdf, handle)['Z'], extract_z(gdf, raster)['Z'])
+
+        if memmap:
+            assert isinstance(handle.array, np.memmap)
+            temporary_file = handle._temporary_file
+            assert os.path.exists(temporary_file)
+
+    # The temporary file is removed when leaving the context or when the handle is garbage collected
+    if memmap:
+        assert not os.path.exists(temporary_file)
+
+        handle = RasterHandle('../../gemgis/data/Test1/raster1.tif', memmap=True)
+        assert isinstance(handle.array, np.memmap)
+        temporary_file = handle._temporary_file
+        assert os.path.exists(temporary_file)
+        del handle
+        gc.collect()
+        assert not os.path.exists(temporary_file)
+
+    with pytest.raises(TypeError):
+        RasterHandle('../../gemgis/data/Test1/raster1.tif', memmap='yes')
+
+
+# Testing save_as_tiff options
+###########################################################
+def test_save_as_tiff_options(tmp_path):
+    from gemgis.raster import save_as_tiff
+
+    array = np.random.default_rng(1).random((300, 200))
+
+    save_as_tiff(str(tmp_path / 'tiled.tif'), array, [0, 200, 0, 300], 'EPSG:4326', tiled=True, blocksize=64,
+                 compress='zstd', predictor=3, overviews=[2, 4])
+
+    with rasterio.open(tmp_path / 'tiled.tif') as dst:
+        assert dst.block_shapes[0] == (64, 64)
+        assert dst.compression == rasterio.enums.Compression.zstd
+        assert dst.overviews(1) == [2, 4]
+        assert np.array_equal(np.flipud(dst.read(1)), array)
+
+    save_as_tiff(str(tmp_path / 'cog.tif'), np.stack([array, 2 * array]), [0, 200, 0, 300], 'EPSG:4326', cog=True,
+                 compress='deflate')
+
+    with rasterio.open(tmp_path / 'cog.tif') as dst:
+        assert dst.count == 2
+        assert dst.profile['tiled']
+        assert dst.compression == rasterio.enums.Compression.deflate
+        assert np.array_equal(np.flipud(dst.read(2)), 2 * array)
+
+    # Streaming chunks of rows from a generator
+    chunks = ((start, array[start:start + 50]) for start in range(0, 300, 50))
+    save_as_tiff(str(tmp_path / 'streamed.tif'), chunks, [0, 200, 0, 300], 'EPSG:4326', shape=array.shape,
+                 dtype=array.dtype)
+
+    with rasterio.open(tmp_path / 'streamed.tif') as dst:
+        assert np.array_equal(np.flipud(dst.read(1)), array)
+
+    with pytest.raises(ValueError):
+        save_as_tiff(str(tmp_path / 'error.tif'), array, [0, 200, 0, 300], 'EPSG:4326', compress='jpeg2000')
+    with pytest.raises(ValueError):
+        save_as_tiff(str(tmp_path / 'error.tif'), (n for n in []), [0, 200, 0, 300], 'EPSG:4326')
+    with pytest.raises(ValueError):
+        save_as_tiff(str(tmp_path / 'error.tif'), array, [0, 200, 0, 300], 'EPSG:4326', overviews=[2],
+                     overview_resampling='mean')
+
+    # The temporary GeoTIFF of a Cloud Optimized GeoTIFF is removed also if writing fails
+    def failing_chunks():
+        yield 0, array[:50]
+        raise RuntimeError('Reading failed')
+
+    files = sorted(tmp_path.iterdir())
+    with pytest.raises(RuntimeError):
+        save_as_tiff(str(tmp_path / 'failed.tif'), failing_chunks(), [0, 200, 0, 300], 'EPSG:4326', cog=True,
+                     shape=array.shape, dtype=array.dtype)
+    assert sorted(tmp_path.iterdir()) == files
+
+
+# Testing sample_randomly batch
+###########################################################
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_randomly_batch(dem):
+    from gemgis.raster import sample_randomly, sample_points
+
+    array = dem.read(1)
+    extent = [0, 972, 0, 1069]
+
+    values, points = sample_randomly(array, extent, random_samples=1000, seed=1)
+    values_seed, points_seed = sample_randomly(array, extent, random_samples=1000, seed=1)
+
+    assert values.shape == (1000,)
+    assert points.shape == (1000, 2)
+    assert np.array_equal(points, points_seed)
+    assert np.array_equal(values, values_seed)
+    assert (points[:, 0] >= 0).all() and (points[:, 0] <= 972).all()
+    assert (points[:, 1] >= 0).all() and (points[:, 1] <= 1069).all()
+    assert np.array_equal(values, sample_points(array, extent, points))
+
+    with pytest.raises(TypeError):
+        sample_randomly(array, extent, random_samples=10.0)
+    with pytest.raises(ValueError):
+        sample_randomly(array, extent, random_samples=0)
+
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_orientations_random_same_points(dem):
+    from gemgis.raster import sample_orientations, sample_interfaces
+
+    extent = [0, 972, 0, 1069]
+
+    orientations = sample_orientations(dem, extent, random_samples=50, seed=2, formation='surface')
+    interfaces = sample_interfaces(dem, extent, random_samples=50, seed=2, formation='surface')
+    orientations_points = sample_orientations(dem, extent, points=orientations[['X', 'Y']].values.tolist(),
+                                              formation='surface')
+
+    assert len(orientations) == 50
+    pd.testing.assert_frame_equal(orientations, orientations_points)
+    assert np.array_equal(orientations[['X', 'Y', 'Z']].values, interfaces[['X', 'Y', 'Z']].values)
+
+
+# Testing sampling strategies
+###########################################################
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_randomly_strategies(dem):
+    from gemgis.raster import sample_randomly, sample_points, calculate_slope
+    from scipy.spatial import cKDTree
+
+    array = dem.read(1)
+    extent = [0, 972, 0, 1069]
+
+    for strategy in ['uniform', 'stratified', 'poisson']:
+        values, points = sample_randomly(array, extent, random_samples=500, seed=1, strategy=strategy)
+        assert points.shape == (500, 2)
+        assert (points[:, 0] >= 0).all() and (points[:, 0] <= 972).all()
+        assert (points[:, 1] >= 0).all() and (points[:, 1] <= 1069).all()
+
+    # Stratified points cover every cell of a coarse grid
+    values, points = sample_randomly(array, extent, random_samples=100, seed=1, strategy='stratified')
+    counts = np.histogram2d(points[:, 0], points[:, 1], bins=[5, 5], range=[[0, 972], [0, 1069]])[0]
+    assert (counts > 0).all()
+
+    # Poisson-disk points keep the minimum distance
+    values, points = sample_randomly(array, extent, random_samples=200, seed=1, strategy='poisson', radius=40.0)
+    distance = cKDTree(points).query(points, k=2)[0][:, 1]
+    assert distance.min() >= 40
+    assert len(points) <= 200
+
+    # Weighted points only fall into cells with weights larger than zero
+    weights = np.zeros(array.shape)
+    weights[:array.shape[0] // 10, -(array.shape[1] // 10):] = 1
+    values, points = sample_randomly(array, extent, random_samples=200, seed=1, strategy='weighted', weights=weights)
+    assert (points[:, 0] >= 972 - (array.shape[1] // 10) * 972 / array.shape[1]).all()
+    assert (points[:, 1] >= 1069 - (array.shape[0] // 10) * 1069 / array.shape[0]).all()
+
+    # Slope weighted points are drawn on steeper slopes on average
+    slope = calculate_slope(array, extent)
+    values, points = sample_randomly(array, extent, random_samples=2000, seed=1, strategy='weighted',
+                                     weights='slope')
+    assert sample_points(slope, extent, points).mean() > slope.mean()
+
+    with pytest.raises(ValueError):
+        sample_randomly(array, extent, random_samples=10, strategy='hexagonal')
+    with pytest.raises(TypeError):
+        sample_randomly(array, extent, random_samples=10, strategy='weighted')
+    with pytest.raises(ValueError):
+        sample_randomly(array, extent, random_samples=10, strategy='weighted', weights=-weights)
+    with pytest.raises(ValueError):
+        sample_randomly(array, extent, random_samples=10, strategy='weighted', weights='aspect')
+
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_sample_orientations_strategies(dem):
+    from gemgis.raster import sample_orientations, sample_interfaces
+
+    extent = [0, 972, 0, 1069]
+
+    orientations = sample_orientations(dem, extent, random_samples=50, seed=1, strategy='stratified',
+                                       formation='surface')
+    interfaces = sample_interfaces(dem, extent, random_samples=50, seed=1, strategy='weighted', weights='slope',
+                                   formation='surface')
+
+    assert len(orientations) == 50
+    assert len(interfaces) == 50
+    assert orientations[['X', 'Y', 'Z', 'dip', 'azimuth']].notna().all().all()
+
+
+# Testing adaptive orientation sampling
+###########################################################
+
+def test_sample_orientations_adaptive():
+    from gemgis.raster import sample_orientations
+
+    # Creating a flat western part, a dipping central part and a rough eastern part
+    rng = np.random.default_rng(1)
+    array = np.zeros((100, 150))
+    array[:, 50:100] = np.arange(50) * 2.0
+    array[:, 100:] = 100 + rng.normal(0, 20, (100, 50))
+    extent = [0, 150, 0, 100]
+
+    orientations = sample_orientations(array, extent, random_samples=300, seed=1, adaptive=True)
+
+    assert isinstance(orientations, pd.DataFrame)
+    assert 0 < len(orientations) <= 300
+    assert (orientations['X'] >= 45).all()
+    assert (orientations['X'] < 100).mean() > 0.9
+
+    # Keeping all points if no coherence is required
+    orientations = sample_orientations(array, extent, random_samples=300, seed=1, adaptive=True, min_coherence=0)
+    assert len(orientations) == 300
+
+    # Creating a dipping plane in the upper half and a rough lower half, the first row is the top of the array
+    array_y = np.zeros((100, 100))
+    array_y[:50] = np.arange(50)[:, np.newaxis] * 2.0
+    array_y[50:] = 100 + rng.normal(0, 20, (50, 100))
+
+    orientations = sample_orientations(array_y, [0, 100, 0, 100], random_samples=300, seed=1, adaptive=True)
+    assert len(orientations) > 0
+    assert (orientations['Y'] >= 45).mean() > 0.9
+
+    # Uniformly dipping planes have a constant local variance and are sampled everywhere
+    x, y = np.meshgrid(np.arange(100), np.arange(100))
+    for plane in [2.0 * x + 3.0 * y, 2 * x + 3 * y]:
+        for thinning in [0, 0.25]:
+            orientations = sample_orientations(plane, [0, 100, 0, 100], 200, seed=1, adaptive=True,
+                                               thinning=thinning)
+            assert len(orientations) > 150
+
+    with pytest.raises(TypeError):
+        sample_orientations(array, extent, random_samples=300, adaptive='True')
+    with pytest.raises(TypeError):
+        sample_orientations(array, extent, random_samples=300, adaptive=True, window=5.0)
+    with pytest.raises(ValueError):
+        sample_orientations(array, extent, random_samples=300, adaptive=True, thinning=1.5)
+    with pytest.raises(ValueError):
+        sample_orientations(array, extent, random_samples=300, adaptive=True, min_coherence=1.5)
+
+
+# Testing resample
+###########################################################
+
+def test_resample():
+    from gemgis.raster import resample
+
+    array = np.random.default_rng(1).random((600, 400)).astype(np.float32)
+
+    array_resampled = resample(array, (200, 100), method='average')
+    assert array_resampled.dtype == np.float32
+    assert np.allclose(array_resampled, array.reshape(200, 3, 100, 4).mean(axis=(1, 3)), atol=1e-6)
+
+    array_resampled = resample(array, (200, 100), method='nearest')
+    assert np.array_equal(array_resampled, array[1::3, 2::4])
+
+    array_resampled = resample(array, (1200, 800), method='bilinear', chunk_size=7)
+    assert array_resampled.dtype == np.float32
+    assert array_resampled.min() >= array.min() and array_resampled.max() <= array.max()
+    assert np.array_equal(array_resampled, resample(array, (1200, 800), method='bilinear'))
+
+    out = np.empty((437, 291), dtype=np.float32)
+    array_resampled = resample(array, (437, 291), method='average', out=out)
+    assert array_resampled is out
+    assert np.isclose(array_resampled.mean(), array.mean(), atol=1e-4)
+
+    # Integer arrays keep their dtype and the most frequent value is used for categories
+    categories = np.zeros((60, 40), dtype=np.uint8)
+    categories[:2, :4] = 5
+    array_resampled = resample(categories, (20, 10), method='mode')
+    assert array_resampled.dtype == np.uint8
+    assert array_resampled[0, 0] == 5
+    assert (array_resampled.ravel()[1:] == 0).all()
+    assert resample(categories, (120, 80), method='bilinear').dtype == np.uint8
+
+    with pytest.raises(TypeError):
+        resample([array], (20, 10))
+    with pytest.raises(ValueError):
+        resample(array, (20, 10.5))
+    with pytest.raises(ValueError):
+        resample(array, (20, 10), method='cubic')
+    with pytest.raises(ValueError):
+        resample(array, (20, 10), out=np.empty((10, 20)))
+
+
+@pytest.mark.parametrize("dem",
+                         [
+                             rasterio.open('../../gemgis/data/Test1/raster1.tif')
+                         ])
+def test_resample_raster(dem):
+    from gemgis.raster import resample, resize_by_array, calculate_difference
+
+    array_resampled = resample(dem, (55, 50), method='average')
+    assert array_resampled.shape == (55, 50)
+    assert array_resampled.dtype == dem.dtypes[0]
+    assert np.allclose(array_resampled, resample(dem.read(1), (55, 50), method='average'), atol=1e-3)
+
+    array_resized = resize_by_array(dem, np.empty((550, 500)))
+    assert array_resized.shape == (550, 500)
+    assert array_resized.dtype == dem.dtypes[0]
+
+    array_diff = calculate_difference(array_resized, dem, flip_array=False)
+    assert array_diff.shape == (550, 500)
+    assert np.abs(array_diff).max() < 1
+
+    # Unsigned arrays of different shapes give negative differences
+    array_diff = calculate_difference(np.full((20, 10), 100, dtype=np.uint16), np.full((40, 20), 150, dtype=np.uint16))
+    assert array_diff.shape == (20, 10)
+    assert np.all(array_diff == -50)
+
+
+# Testing calculate_difference_tiled on different grids
+###########################################################
+
+def test_calculate_difference_tiled_aligned(tmp_path):
+    from gemgis.raster import calculate_difference_tiled
+    from rasterio.warp import reproject, calculate_default_transform
+
+    # Creating a plane on a 10 m grid and the same plane raised by 10 m on a coarser grid covering the eastern part
+    x, y = np.meshgrid(np.arange(200) * 10 + 5, 2000 - np.arange(200) * 10 - 5)
+    transform1 = rasterio.transform.from_origin(500000, 5602000, 10, 10)
+    with rasterio.open(tmp_path / 'raster1.tif', 'w', driver='GTiff', height=200, width=200, count=1,
+                       dtype='float32', crs='EPSG:25832', transform=transform1) as dst:
+        dst.write((x + y).astype(np.float32), 1)
+
+    x, y = np.meshgrid(np.arange(50) * 20 + 10, 2000 - np.arange(100) * 20 - 10)
+    transform2 = rasterio.transform.from_origin(501000, 5602000, 20, 20)
+    with rasterio.open(tmp_path / 'raster2.tif', 'w', driver='GTiff', height=100, width=50, count=1,
+                       dtype='float32', crs='EPSG:25832', transform=transform2) as dst:
+        dst.write((x + 1000 + y + 10).astype(np.float32), 1)
+
+    with rasterio.open(tmp_path / 'raster1.tif') as raster1, rasterio.open(tmp_path / 'raster2.tif') as raster2:
+        calculate_difference_tiled(raster1, raster2, str(tmp_path / 'diff.tif'), tile_size=32, workers=2)
+
+        with rasterio.open(tmp_path / 'diff.tif') as diff:
+            assert diff.shape == (200, 100)
+            assert diff.transform == rasterio.transform.from_origin(501000, 5602000, 10, 10)
+            assert diff.crs == raster1.crs
+            assert np.allclose(diff.read(1)[1:-1, 1:-1], -10, atol=1e-3)
+
+        # Reprojecting raster2 to geographic coordinates
+        transform, width, height = calculate_default_transform(raster2.crs, 'EPSG:4326', raster2.width,
+                                                               raster2.height, *raster2.bounds)
+        array = np.full((height, width), np.nan, dtype=np.float32)
+        reproject(raster2.read(1), array, src_transform=raster2.transform, src_crs=raster2.crs,
+                  dst_transform=transform, dst_crs='EPSG:4326', resampling=rasterio.enums.Resampling.bilinear)
+        with rasterio.open(tmp_path / 'raster3.tif', 'w', driver='GTiff', height=height, width=width, count=1,
+                           dtype='float32', crs='EPSG:4326', transform=transform, nodata=np.nan) as dst:
+            dst.write(array, 1)
+
+        with rasterio.open(tmp_path / 'raster3.tif') as raster3:
+            calculate_difference_tiled(raster1, raster3, str(tmp_path / 'diff.tif'), tile_size=64)
+
+        with rasterio.open(tmp_path / 'diff.tif') as diff:
+            array_diff = diff.read(1)
+            assert np.isnan(diff.nodata)
+            assert np.isfinite(array_diff).mean() > 0.9
+            assert np.nanmedian(np.abs(array_diff + 10)) < 1
+
+        with pytest.raises(ValueError):
+            calculate_difference_tiled(raster1, raster2, str(tmp_path / 'diff.tif'), resampling='spline')
+
 
 # TODO: Test extract_borehole
 # TODO: Test plot_depth_map